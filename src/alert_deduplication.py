@@ -42,7 +42,11 @@ class AlertDeduplicator:
         key = f"{camera}:{person}"
         
         # Convert objects to set for comparison
-        current_objects = set(obj['class'] for obj in objects if obj['class'] != 'person')
+        if hasattr(objects, "class_names"):
+            # DetectionBatch: unique classes straight from the class-id column
+            current_objects = objects.class_names() - {'person'}
+        else:
+            current_objects = set(obj['class'] for obj in objects if obj['class'] != 'person')
         
         # Check if we have an active detection for this camera
         if camera in self.active_detections:
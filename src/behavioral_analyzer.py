@@ -1,16 +1,40 @@
 """Behavioral Analyzer Module - Track movement patterns and detect anomalies"""
+import os
 import json
 import logging
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
 import numpy as np
 import pandas as pd
 from collections import defaultdict
 
+from event_store import EventStore, to_epoch, from_epoch, hours_of_day
+from event_archive import EventArchive
+from config import BEHAVIORAL_CONFIG, CAMERAS
+from event_writer import BufferedAppendWriter
+
 logger = logging.getLogger(__name__)
 
+GRID_SIZE = 16  # Occupancy grid cells per side
+DEFAULT_FRAME_SIZE = (1920, 1080)  # Eufy snapshot resolution (width, height), if unknown
+
+
+def position_cells(x, y, width: float, height: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Occupancy grid (row, col) indices of pixel positions normalized to frame size"""
+    cols = np.asarray(x, dtype=np.float64) / width * GRID_SIZE
+    rows = np.asarray(y, dtype=np.float64) / height * GRID_SIZE
+    return (np.clip(rows, 0, GRID_SIZE - 1).astype(np.int64),
+            np.clip(cols, 0, GRID_SIZE - 1).astype(np.int64))
+
+
+def empty_grid() -> np.ndarray:
+    return np.zeros((GRID_SIZE, GRID_SIZE), dtype=np.float32)
+
 
 @dataclass
 class MovementEvent:
@@ -18,7 +42,7 @@ class MovementEvent:
     timestamp: datetime
     camera: str
     person_id: Optional[str]
-    position: Tuple[float, float]  # x, y normalized coordinates (0-1)
+    position: Tuple[float, float]  # x, y bbox center in pixels
     confidence: float
     
     def to_dict(self) -> dict:
@@ -50,9 +74,28 @@ class BehavioralPattern:
     day_of_week: int
     avg_duration_minutes: float
     frequency_score: float  # 0-1, how often this pattern occurs
-    typical_positions: List[Tuple[float, float]]
+    position_grid: np.ndarray = field(default_factory=empty_grid)  # Occupancy counts per cell
+    
+    def position_density(self, row: int, col: int) -> float:
+        """Share of observations in a cell and its 8 neighbours (O(1) lookup)"""
+        total = float(self.position_grid.sum())
+        if total <= 0:
+            return 1.0
+        block = self.position_grid[max(row - 1, 0):row + 2, max(col - 1, 0):col + 2]
+        return float(block.sum()) / total
+    
+    def density_map(self) -> np.ndarray:
+        """position_density() for every cell at once"""
+        total = float(self.position_grid.sum())
+        if total <= 0:
+            return np.ones_like(self.position_grid)
+        padded = np.pad(self.position_grid, 1)
+        block = sum(padded[dr:dr + GRID_SIZE, dc:dc + GRID_SIZE]
+                    for dr in range(3) for dc in range(3))
+        return block / total
     
     def to_dict(self) -> dict:
+        rows, cols = np.nonzero(self.position_grid)
         return {
             "person_id": self.person_id,
             "camera": self.camera,
@@ -60,8 +103,149 @@ class BehavioralPattern:
             "day_of_week": self.day_of_week,
             "avg_duration_minutes": self.avg_duration_minutes,
             "frequency_score": self.frequency_score,
-            "typical_positions": self.typical_positions
+            "grid_size": GRID_SIZE,
+            "position_cells": {
+                str(int(r) * GRID_SIZE + int(c)): round(float(self.position_grid[r, c]), 4)
+                for r, c in zip(rows, cols)
+            }
         }
+    
+    @classmethod
+    def from_dict(cls, data: dict,
+                  frame_size: Tuple[int, int] = DEFAULT_FRAME_SIZE) -> "BehavioralPattern":
+        grid = empty_grid()
+        if data.get("grid_size", GRID_SIZE) == GRID_SIZE:
+            for cell, count in data.get("position_cells", {}).items():
+                grid.flat[int(cell)] = count
+        if data.get("typical_positions"):
+            # Legacy files: rebuild the grid from the sampled pixel positions
+            x, y = np.asarray(data["typical_positions"], dtype=np.float64).T
+            np.add.at(grid, position_cells(x, y, *frame_size), 1)
+        return cls(
+            person_id=data["person_id"],
+            camera=data["camera"],
+            hour_of_day=data["hour_of_day"],
+            day_of_week=data["day_of_week"],
+            avg_duration_minutes=data["avg_duration_minutes"],
+            frequency_score=data["frequency_score"],
+            position_grid=grid
+        )
+
+
+@dataclass
+class PatternStats:
+    """Running statistics behind one incrementally maintained pattern"""
+    count: float = 0.0  # Decayed occurrence weight
+    gap_sum: float = 0.0  # Minutes between consecutive detections (< 30 min)
+    gap_count: float = 0.0
+    last_seen: Optional[datetime] = None
+    grid: np.ndarray = field(default_factory=empty_grid)  # Decayed occupancy counts
+    seen: int = 0  # Undecayed occurrences
+    # Which pattern these stats belong to
+    camera: str = ""
+    person_id: Optional[str] = None
+    hour_of_day: int = 0
+    day_of_week: int = 0
+    
+    @property
+    def avg_duration(self) -> float:
+        return self.gap_sum / self.gap_count if self.gap_count else 0.0
+    
+    def decay(self, factor: float):
+        self.count *= factor
+        self.gap_sum *= factor
+        self.gap_count *= factor
+        self.grid *= factor
+    
+    def add(self, timestamp: datetime, cell: Tuple[int, int]):
+        if self.last_seen is not None:
+            gap = abs((timestamp - self.last_seen).total_seconds()) / 60
+            if gap < 30:  # Only count consecutive detections
+                self.gap_sum += gap
+                self.gap_count += 1
+            self.last_seen = max(self.last_seen, timestamp)
+        else:
+            self.last_seen = timestamp
+        
+        self.count += 1
+        self.seen += 1
+        self.grid[cell] += 1
+    
+    def to_dict(self) -> dict:
+        cells = np.flatnonzero(self.grid)
+        return {
+            "count": self.count,
+            "gap_sum": self.gap_sum,
+            "gap_count": self.gap_count,
+            "last_seen": self.last_seen.isoformat() if self.last_seen else None,
+            "seen": self.seen,
+            "cells": {str(int(c)): float(self.grid.flat[c]) for c in cells},
+            "camera": self.camera,
+            "person_id": self.person_id,
+            "hour_of_day": self.hour_of_day,
+            "day_of_week": self.day_of_week
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "PatternStats":
+        grid = empty_grid()
+        for cell, count in data.get("cells", {}).items():
+            grid.flat[int(cell)] = count
+        return cls(
+            count=data["count"],
+            gap_sum=data["gap_sum"],
+            gap_count=data["gap_count"],
+            last_seen=datetime.fromisoformat(data["last_seen"]) if data["last_seen"] else None,
+            grid=grid,
+            seen=data["seen"],
+            camera=data["camera"],
+            person_id=data["person_id"],
+            hour_of_day=data["hour_of_day"],
+            day_of_week=data["day_of_week"]
+        )
+
+
+def events_frame(columns: Dict[str, np.ndarray], store: EventStore,
+                 frame_size_of: Callable[[str], Tuple[int, int]]) -> pd.DataFrame:
+    """DataFrame of EventStore columns (with occupancy grid cells) for grouped analysis"""
+    df = pd.DataFrame({
+        "timestamp": pd.to_datetime(columns["timestamp"], unit="s"),
+        "camera": store.camera_names(columns["camera"]),
+        "person_id": store.person_names(columns["person"], missing="unknown"),
+        "x": columns["x"],
+        "y": columns["y"]
+    })
+    df["hour"] = df["timestamp"].dt.hour
+    df["day_of_week"] = df["timestamp"].dt.dayofweek
+    sizes = np.array([frame_size_of(camera) for camera in store.cameras] or [(0, 0)],
+                     dtype=np.float64)[columns["camera"]]
+    df["row"], df["col"] = position_cells(df["x"], df["y"], sizes[:, 0], sizes[:, 1])
+    return df
+
+
+def _camera_patterns(archive_root: str, camera: str, start: Optional[float],
+                     recent: Optional[pd.DataFrame], frame_size: Tuple[int, int],
+                     total_days: int, half_life_days: Optional[float],
+                     seed: bool) -> Tuple[Dict[str, "BehavioralPattern"], Dict[str, "PatternStats"]]:
+    """
+    Process-pool entry point (module level to pickle): patterns of one camera,
+    plus seeded incremental stats when `seed` is set.
+    
+    The worker reads the camera's archived events itself from the memory-mapped
+    partitions; only the not-yet-archived `recent` rows are sent by the parent.
+    """
+    store = EventStore()
+    columns = EventArchive(archive_root).columns(store, start=start, camera=camera)
+    parts = [events_frame(columns, store, lambda _: frame_size)] if len(columns["timestamp"]) else []
+    if recent is not None:
+        parts.append(recent)
+    if not parts:
+        return {}, {}
+    df = pd.concat(parts, ignore_index=True)
+    patterns = BehavioralAnalyzer._compute_patterns(df, total_days)
+    stats = BehavioralAnalyzer._stats_from_groups(
+        *BehavioralAnalyzer._group_stats(df, half_life_days)) if seed else {}
+    return patterns, stats
 
 
 class BehavioralAnalyzer:
@@ -74,35 +258,96 @@ class BehavioralAnalyzer:
     - Detect anomalies in routines
     """
     
-    def __init__(self, data_dir: Path, min_baseline_days: int = 7):
+    def __init__(self, data_dir: Path, min_baseline_days: int = 7,
+                 incremental: bool = False,
+                 decay_half_life_days: Optional[float] = None,
+                 frame_size: Tuple[int, int] = DEFAULT_FRAME_SIZE,
+                 camera_frame_sizes: Optional[Dict[str, Tuple[int, int]]] = None):
+        """
+        Args:
+            data_dir: Directory for events/patterns files
+            min_baseline_days: Days of history needed before anomalies are trusted
+            incremental: Update patterns on every record_movement() instead of
+                only on build_baseline()
+            decay_half_life_days: In incremental mode, halve the weight of old
+                observations every this many days (None = no decay)
+            frame_size: (width, height) used to normalize pixel positions of
+                cameras whose resolution is not known
+            camera_frame_sizes: Per-camera (width, height); otherwise taken from
+                CAMERAS "frame_size" or learned from recorded frames
+        """
         self.data_dir = Path(data_dir)
         self.events_file = self.data_dir / "behavioral_events.jsonl"
         self.patterns_file = self.data_dir / "behavioral_patterns.json"
+        self.pattern_stats_file = self.data_dir / "behavioral_pattern_stats.json"
+        self.frame_sizes_file = self.data_dir / "camera_frame_sizes.json"
         self.min_baseline_days = min_baseline_days
         
         self.data_dir.mkdir(parents=True, exist_ok=True)
         
-        # In-memory storage
-        self.events: List[MovementEvent] = []
+        # Frame sizes: config, then sizes learned from frames, then explicit overrides
+        self.frame_size = frame_size
+        self.camera_frame_sizes: Dict[str, Tuple[int, int]] = {
+            camera: tuple(cfg["frame_size"]) for camera, cfg in CAMERAS.items()
+            if cfg.get("frame_size")
+        }
+        self.camera_frame_sizes.update(self._load_frame_sizes())
+        self.camera_frame_sizes.update(camera_frame_sizes or {})
+        
+        # Past days live in the day-partitioned archive (memory-mapped on
+        # demand); the JSONL log and self.events only hold recent events
+        self.archive = EventArchive(self.data_dir / "behavioral_archive")
+        self.events = EventStore()
+        # Held while a day moves from memory to the archive, so readers see
+        # each event exactly once
+        self._data_lock = threading.RLock()
+        self._next_compaction = 0.0
+        self._compact_lock = threading.Lock()
         self.patterns: Dict[str, BehavioralPattern] = {}
         
+        # Secondary indexes over self.patterns (kept in sync by _index_pattern)
+        self._keys_by_person: Dict[Optional[str], Set[str]] = defaultdict(set)
+        self._keys_by_camera: Dict[str, Set[str]] = defaultdict(set)
+        self._cameras_by_person: Dict[Optional[str], Set[str]] = defaultdict(set)
+        
         # Anomaly detection threshold (percentile)
         self.anomaly_threshold = 0.95
+        # Positions whose neighbourhood holds less than this share of a
+        # pattern's observations are unusual, once the pattern has at least
+        # min_position_observations of them
+        self.position_density_threshold = 0.02
+        self.min_position_observations = 10
+        
+        # Incremental baseline state
+        self.incremental = incremental
+        self.decay_half_life_days = decay_half_life_days
+        self._pattern_stats: Dict[str, PatternStats] = {}
+        self._span: Optional[Tuple[datetime, datetime]] = None
         
+        self.writer = BufferedAppendWriter(self.events_file)
         self._load_data()
-        logger.info(f"BehavioralAnalyzer initialized with {len(self.events)} events")
+        if self.incremental:
+            self._init_pattern_stats()
+        logger.info(f"BehavioralAnalyzer initialized with {self.event_count()} events")
     
     def _load_data(self):
-        """Load existing events and patterns from disk"""
-        # Load events
+        """Archive complete days, then load recent events and patterns from disk"""
+        self.compact()
+        
+        # Load events not yet archived
         if self.events_file.exists():
             try:
                 with open(self.events_file, 'r') as f:
                     for line in f:
                         if line.strip():
                             data = json.loads(line)
-                            self.events.append(MovementEvent.from_dict(data))
-                logger.info(f"Loaded {len(self.events)} behavioral events")
+                            x, y = data["position"]
+                            self.events.append(
+                                datetime.fromisoformat(data["timestamp"]), data["camera"],
+                                data.get("person_id"), x, y, data["confidence"]
+                            )
+                logger.info(f"Loaded {len(self.events)} recent behavioral events "
+                            f"({self.archive.count} archived in {len(self.archive.days)} days)")
             except Exception as e:
                 logger.error(f"Failed to load events: {e}")
         
@@ -112,25 +357,139 @@ class BehavioralAnalyzer:
                 with open(self.patterns_file, 'r') as f:
                     patterns_data = json.load(f)
                     for key, data in patterns_data.items():
-                        self.patterns[key] = BehavioralPattern(**data)
+                        self.patterns[key] = BehavioralPattern.from_dict(
+                            data, self._frame_size(data["camera"]))
+                self._rebuild_indexes()
                 logger.info(f"Loaded {len(self.patterns)} behavioral patterns")
             except Exception as e:
                 logger.error(f"Failed to load patterns: {e}")
     
+    def _load_frame_sizes(self) -> Dict[str, Tuple[int, int]]:
+        """Frame sizes learned from earlier runs"""
+        if not self.frame_sizes_file.exists():
+            return {}
+        try:
+            with open(self.frame_sizes_file, 'r') as f:
+                return {camera: tuple(size) for camera, size in json.load(f).items()}
+        except Exception as e:
+            logger.error(f"Failed to load camera frame sizes: {e}")
+            return {}
+    
+    def has_frame_size(self, camera: str) -> bool:
+        """Whether the camera's resolution is known (not the DEFAULT_FRAME_SIZE guess)"""
+        return camera in self.camera_frame_sizes
+    
+    def set_frame_size(self, camera: str, frame_size: Tuple[int, int]):
+        """Record a camera's (width, height); persisted when it changes"""
+        frame_size = (int(frame_size[0]), int(frame_size[1]))
+        if self.camera_frame_sizes.get(camera) == frame_size:
+            return
+        self.camera_frame_sizes[camera] = frame_size
+        try:
+            with open(self.frame_sizes_file, 'w') as f:
+                json.dump({c: list(size) for c, size in self.camera_frame_sizes.items()}, f, indent=2)
+        except Exception as e:
+            logger.error(f"Failed to save camera frame sizes: {e}")
+    
+    def compact(self):
+        """Move complete days from the JSONL log into the archive and out of memory"""
+        today = datetime.now().date()
+        cutoff = to_epoch(datetime.combine(today, datetime.min.time()))
+        with self._compact_lock:
+            try:
+                with self._data_lock:
+                    if self.events_file.exists():
+                        with self.writer.paused():
+                            self.archive.import_jsonl(self.events_file, before=today)
+                    nbytes = self.events.nbytes
+                    dropped = self.events.drop_before(cutoff)
+                if dropped:
+                    logger.info(f"Dropped {dropped} archived events from memory "
+                                f"({nbytes // 1024} -> {self.events.nbytes // 1024} KiB)")
+            except Exception as e:
+                logger.error(f"Failed to archive events: {e}")
+            self._next_compaction = cutoff + 86400
+    
+    def event_count(self) -> int:
+        """Archived plus recent events"""
+        with self._data_lock:
+            return self.archive.count + len(self.events)
+    
+    def _columns(self, names: Optional[List[str]] = None, start: Optional[float] = None,
+                 end: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """
+        Event columns (codes in self.events' tables) with start <= timestamp < end,
+        from the archive partitions in range plus in-memory events not yet archived.
+        """
+        names = list(names or ["timestamp", "camera", "person", "x", "y", "confidence"])
+        with self._data_lock:
+            archived = self.archive.columns(self.events, names, start, end)
+            recent = self.events.range(start, end, names)
+        return {name: np.concatenate([archived[name], recent[name]]) for name in names}
+    
+    def events_between(self, start: datetime, end: datetime, camera: Optional[str] = None,
+                       person: Optional[str] = None) -> List[MovementEvent]:
+        """
+        Events with start <= timestamp < end, oldest first, optionally for one
+        camera and/or person ("unknown" = unidentified).
+        
+        Uses the time index: cost follows the events in range, not history size.
+        """
+        columns = self._columns(start=to_epoch(start), end=to_epoch(end))
+        keep = np.ones(len(columns["timestamp"]), dtype=bool)
+        # Look names up without adding them: queries must not grow the code tables
+        if camera is not None:
+            code = self.events.camera_code(camera, add=False)
+            if code is None:
+                return []
+            keep &= columns["camera"] == code
+        if person is not None:
+            code = -1 if person == "unknown" else self.events.person_code(person, add=False)
+            if code is None:
+                return []
+            keep &= columns["person"] == code
+        
+        rows = np.flatnonzero(keep)
+        rows = rows[np.argsort(columns["timestamp"][rows], kind="stable")]
+        cameras = self.events.camera_names(columns["camera"][rows])
+        persons = self.events.person_names(columns["person"][rows])
+        return [
+            MovementEvent(from_epoch(columns["timestamp"][i]), cam, pid,
+                          (float(columns["x"][i]), float(columns["y"][i])),
+                          float(columns["confidence"][i]))
+            for i, cam, pid in zip(rows, cameras, persons)
+        ]
+    
+    def _time_range(self) -> Optional[Tuple[datetime, datetime]]:
+        ranges = [r for r in (self.archive.time_range(), self.events.time_range()) if r]
+        if not ranges:
+            return None
+        return min(r[0] for r in ranges), max(r[1] for r in ranges)
+    
     def _save_event(self, event: MovementEvent):
-        """Append event to persistent storage"""
-        with open(self.events_file, 'a') as f:
-            f.write(json.dumps(event.to_dict()) + '\n')
+        """Queue event for the background append writer"""
+        self.writer.write(json.dumps(event.to_dict()))
+    
+    def flush(self):
+        """Block until recorded events are on disk"""
+        self.writer.flush()
+    
+    def close(self):
+        """Flush buffered events, checkpoint incremental state and stop the writer"""
+        if self.incremental:
+            self._save_pattern_stats()
+        self.writer.close()
     
     def _save_patterns(self):
         """Save patterns to persistent storage"""
-        patterns_data = {k: asdict(v) for k, v in self.patterns.items()}
+        patterns_data = {k: v.to_dict() for k, v in self.patterns.items()}
         with open(self.patterns_file, 'w') as f:
             json.dump(patterns_data, f, indent=2)
     
     def record_movement(self, camera: str, bbox: List[float], 
                        confidence: float, person_id: Optional[str] = None,
-                       timestamp: Optional[datetime] = None) -> MovementEvent:
+                       timestamp: Optional[datetime] = None,
+                       frame_size: Optional[Tuple[int, int]] = None) -> MovementEvent:
         """
         Record a movement event.
         
@@ -140,12 +499,15 @@ class BehavioralAnalyzer:
             confidence: Detection confidence
             person_id: Optional person identifier (for re-identification)
             timestamp: Event timestamp (defaults to now)
+            frame_size: (width, height) of the frame the bbox comes from
         
         Returns:
             Created MovementEvent
         """
         if timestamp is None:
             timestamp = datetime.now()
+        if frame_size is not None:
+            self.set_frame_size(camera, frame_size)
         
         # Normalize bbox center to 0-1 range (assuming normalized coords)
         x_center = (bbox[0] + bbox[2]) / 2
@@ -159,8 +521,15 @@ class BehavioralAnalyzer:
             confidence=confidence
         )
         
-        self.events.append(event)
+        self.events.append(timestamp, camera, person_id, x_center, y_center, confidence)
         self._save_event(event)
+        if self.incremental:
+            self._update_incremental(event)
+        
+        if to_epoch(timestamp) >= self._next_compaction and not self._compact_lock.locked():
+            # New day: archive the previous one off the hot path
+            self._next_compaction += 86400
+            threading.Thread(target=self.compact, name="behavioral-compact", daemon=True).start()
         
         return event
     
@@ -174,94 +543,345 @@ class BehavioralAnalyzer:
         Returns:
             Summary statistics dict
         """
-        if not self.events:
+        if not self.archive.days and not self.events:
             logger.warning("No events to build baseline")
             return {}
         
-        # Filter events by time window
-        cutoff = datetime.now() - timedelta(days=days) if days else None
-        events = [e for e in self.events if cutoff is None or e.timestamp >= cutoff]
+        # Only the archive partitions inside the window are read, and only the
+        # two columns the summary needs until the build path is chosen
+        start = to_epoch(datetime.now() - timedelta(days=days)) if days else None
+        light = self._columns(["timestamp", "camera"], start=start)
+        total = len(light["timestamp"])
         
-        if not events:
+        if not total:
             logger.warning("No events in specified time window")
             return {}
         
-        # Convert to DataFrame for analysis
-        df = pd.DataFrame([
-            {
-                "timestamp": e.timestamp,
-                "camera": e.camera,
-                "person_id": e.person_id or "unknown",
-                "hour": e.timestamp.hour,
-                "day_of_week": e.timestamp.weekday(),
-                "x": e.position[0],
-                "y": e.position[1]
-            }
-            for e in events
-        ])
-        
-        # Build patterns per camera/hour/day
-        patterns = defaultdict(lambda: defaultdict(list))
-        
-        for _, row in df.iterrows():
-            key = f"{row['camera']}_{row['hour']}_{row['day_of_week']}"
-            patterns[key][row['person_id']].append({
-                "timestamp": row['timestamp'],
-                "position": (row['x'], row['y'])
-            })
-        
-        # Create BehavioralPattern objects
-        self.patterns = {}
-        for key, person_data in patterns.items():
-            camera, hour, dow = key.rsplit('_', 2)
-            
-            for person_id, occurrences in person_data.items():
-                if len(occurrences) < 2:
-                    continue
-                
-                # Calculate average duration
-                timestamps = sorted([o['timestamp'] for o in occurrences])
-                durations = []
-                for i in range(1, len(timestamps)):
-                    duration = (timestamps[i] - timestamps[i-1]).total_seconds() / 60
-                    if duration < 30:  # Only count consecutive detections
-                        durations.append(duration)
-                
-                avg_duration = np.mean(durations) if durations else 0
-                
-                # Calculate frequency score (normalized 0-1)
-                total_days = (df['timestamp'].max() - df['timestamp'].min()).days or 1
-                frequency = len(occurrences) / total_days
-                frequency_score = min(frequency / 10, 1.0)  # Cap at 10 occurrences per day
-                
-                pattern_key = f"{person_id}_{camera}_{hour}_{dow}"
-                self.patterns[pattern_key] = BehavioralPattern(
-                    person_id=person_id if person_id != "unknown" else None,
-                    camera=camera,
-                    hour_of_day=int(hour),
-                    day_of_week=int(dow),
-                    avg_duration_minutes=float(avg_duration),
-                    frequency_score=float(frequency_score),
-                    typical_positions=[o['position'] for o in occurrences[:10]]
-                )
+        first = from_epoch(float(light["timestamp"].min()))
+        last = from_epoch(float(light["timestamp"].max()))
+        total_days = (last - first).days or 1
+        codes, first_rows, camera_counts = np.unique(light["camera"], return_index=True,
+                                                     return_counts=True)
+        cameras = self.events.camera_names(codes[np.argsort(first_rows)]).tolist()
+        
+        workers = BEHAVIORAL_CONFIG.get("baseline_workers") or min(len(cameras), os.cpu_count() or 1)
+        if workers >= 2 and total >= BEHAVIORAL_CONFIG.get("parallel_min_events", 200_000):
+            patterns, pattern_stats = self._build_patterns_parallel(cameras, start, total_days, workers)
+        else:
+            df = self._events_frame(self._columns(start=start))
+            patterns = self._compute_patterns(df, total_days)
+            pattern_stats = self._stats_from_groups(
+                *self._group_stats(df, self.decay_half_life_days)) if self.incremental else {}
+        
+        self.patterns = patterns
+        self._rebuild_indexes()
+        if self.incremental:
+            self._pattern_stats = pattern_stats
+            self._span = (first, last)
         
         self._save_patterns()
         
+        hour_counts = pd.Series(hours_of_day(light["timestamp"])).value_counts()
         summary = {
-            "total_events_analyzed": len(events),
+            "total_events_analyzed": total,
             "patterns_created": len(self.patterns),
-            "cameras": df['camera'].unique().tolist(),
+            "cameras": cameras,
             "date_range": {
-                "start": df['timestamp'].min().isoformat(),
-                "end": df['timestamp'].max().isoformat()
+                "start": first.isoformat(),
+                "end": last.isoformat()
             },
-            "most_active_hours": df.groupby('hour').size().nlargest(3).to_dict(),
-            "most_active_cameras": df.groupby('camera').size().to_dict()
+            "most_active_hours": hour_counts.nlargest(3).to_dict(),
+            "most_active_cameras": dict(zip(self.events.camera_names(codes).tolist(),
+                                            camera_counts.tolist()))
         }
         
-        logger.info(f"Built baseline: {len(self.patterns)} patterns from {len(events)} events")
+        logger.info(f"Built baseline: {len(self.patterns)} patterns from {total} events")
         return summary
     
+    def _frame_size(self, camera: str) -> Tuple[int, int]:
+        return self.camera_frame_sizes.get(camera, self.frame_size)
+    
+    def _event_cell(self, event: MovementEvent) -> Tuple[int, int]:
+        rows, cols = position_cells(event.position[0], event.position[1],
+                                    *self._frame_size(event.camera))
+        return int(rows), int(cols)
+    
+    def _events_frame(self, columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+        return events_frame(columns, self.events, self._frame_size)
+    
+    @staticmethod
+    def _pattern_key(person_id: str, camera: str, hour: int, dow: int) -> str:
+        return f"{person_id}_{camera}_{hour}_{dow}"
+    
+    @staticmethod
+    def _group_stats(df: pd.DataFrame,
+                     half_life_days: Optional[float] = None) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Per camera/hour/day/person aggregates with grouped operations.
+        
+        Expects columns: timestamp, camera, person_id, hour, day_of_week, row, col.
+        
+        With half_life_days, each event is weighted by 0.5 ** (age / half_life),
+        age measured from its group's last event: the state incremental decay
+        reaches after replaying the same events.
+        
+        Returns:
+            (DataFrame indexed by group with occurrences, weight, gap_sum, gap_count,
+             last_seen; array of occupancy grids, one per group row)
+        """
+        keys = ["camera", "hour", "day_of_week", "person_id"]
+        
+        # Gaps between consecutive detections (< 30 min) per group
+        ordered = df.sort_values(keys + ["timestamp"], kind="stable")
+        groups = ordered.groupby(keys, sort=False)["timestamp"]
+        gaps = groups.diff().dt.total_seconds() / 60
+        if half_life_days:
+            age_days = (groups.transform("max") - ordered["timestamp"]).dt.total_seconds() / 86400
+            weight = 0.5 ** (age_days / half_life_days)
+        else:
+            weight = pd.Series(1.0, index=ordered.index)
+        gaps = gaps.where(gaps < 30)
+        ordered = ordered.assign(weight=weight, gap=gaps * weight,
+                                 gap_weight=weight.where(gaps.notna(), 0.0))
+        stats = ordered.groupby(keys, sort=False).agg(
+            occurrences=("timestamp", "size"),
+            weight=("weight", "sum"),
+            gap_sum=("gap", "sum"),
+            gap_count=("gap_weight", "sum"),
+            last_seen=("timestamp", "max")
+        )
+        
+        # Occupancy grids for every group in one scatter-add
+        group_ids = ordered.groupby(keys, sort=False).ngroup().to_numpy()
+        grids = np.zeros((len(stats), GRID_SIZE, GRID_SIZE), dtype=np.float32)
+        np.add.at(grids, (group_ids, ordered["row"].to_numpy(), ordered["col"].to_numpy()),
+                  ordered["weight"].to_numpy(dtype=np.float32))
+        
+        return stats, grids
+    
+    def _build_patterns_parallel(self, cameras: List[str], start: Optional[float],
+                                 total_days: int, workers: int
+                                 ) -> Tuple[Dict[str, BehavioralPattern], Dict[str, PatternStats]]:
+        """
+        Compute patterns (and seeded incremental stats) one camera per worker process.
+        
+        Workers load their camera's archived events from the memory-mapped
+        partitions, so the full history is never materialised in this process.
+        Pattern keys include the camera, so per-camera results merge by union.
+        """
+        patterns, pattern_stats = {}, {}
+        # Hold off compaction: a day moving from memory to the archive mid-build
+        # would be read twice (recent rows here, archive in the worker)
+        with self._compact_lock:
+            recent_columns = self.events.range(start)
+            recent = {}
+            if len(recent_columns["timestamp"]):
+                recent = dict(tuple(self._events_frame(recent_columns).groupby("camera", sort=False)))
+            # spawn: forking a process running writer/queue threads and torch can deadlock
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+                futures = [pool.submit(_camera_patterns, str(self.archive.root), camera, start,
+                                       recent.get(camera), self._frame_size(camera), total_days,
+                                       self.decay_half_life_days, self.incremental)
+                           for camera in cameras]
+                for future in futures:
+                    camera_patterns, camera_stats = future.result()
+                    patterns.update(camera_patterns)
+                    pattern_stats.update(camera_stats)
+        logger.info(f"Built patterns for {len(cameras)} cameras in {workers} processes")
+        return patterns, pattern_stats
+    
+    @classmethod
+    def _compute_patterns(cls, df: pd.DataFrame,
+                          total_days: Optional[int] = None) -> Dict[str, BehavioralPattern]:
+        """Build patterns per camera/hour/day/person from grouped aggregates"""
+        stats, grids = cls._group_stats(df)
+        grids = dict(zip(stats.index, grids))
+        stats = stats[stats["occurrences"] >= 2]
+        if stats.empty:
+            return {}
+        
+        avg_durations = (stats["gap_sum"] / stats["gap_count"]).fillna(0.0)
+        
+        # Frequency score (normalized 0-1), capped at 10 occurrences per day
+        if total_days is None:
+            total_days = (df["timestamp"].max() - df["timestamp"].min()).days or 1
+        frequency_scores = np.minimum(stats["occurrences"] / total_days / 10, 1.0)
+        
+        patterns = {}
+        for key, score in frequency_scores.items():
+            camera, hour, dow, person_id = key
+            patterns[cls._pattern_key(person_id, camera, hour, dow)] = BehavioralPattern(
+                person_id=person_id if person_id != "unknown" else None,
+                camera=camera,
+                hour_of_day=int(hour),
+                day_of_week=int(dow),
+                avg_duration_minutes=float(avg_durations[key]),
+                frequency_score=float(score),
+                position_grid=grids[key]
+            )
+        return patterns
+    
+    def _init_pattern_stats(self):
+        """
+        Restore incremental stats from the checkpoint and replay newer events,
+        so startup does not depend on history length. Without a checkpoint,
+        seed once from the full history.
+        """
+        if self.pattern_stats_file.exists():
+            try:
+                with open(self.pattern_stats_file, 'r') as f:
+                    data = json.load(f)
+                self._pattern_stats = {k: PatternStats.from_dict(v) for k, v in data["stats"].items()}
+                span = data.get("span")
+                self._span = tuple(datetime.fromisoformat(t) for t in span) if span else None
+                self._patterns_from_stats()
+                
+                # Archive too: after an unclean shutdown the checkpoint can
+                # predate days that were archived on startup
+                recent = self._columns(start=data["as_of"])
+                newer = np.flatnonzero(recent["timestamp"] > data["as_of"])
+                newer = newer[np.argsort(recent["timestamp"][newer], kind="stable")]
+                cameras = self.events.camera_names(recent["camera"][newer])
+                persons = self.events.person_names(recent["person"][newer])
+                for i, camera, person in zip(newer, cameras, persons):
+                    self._update_incremental(MovementEvent(
+                        from_epoch(recent["timestamp"][i]), camera, person,
+                        (float(recent["x"][i]), float(recent["y"][i])),
+                        float(recent["confidence"][i])
+                    ))
+                logger.info(f"Restored {len(self._pattern_stats)} pattern stats "
+                            f"(replayed {len(newer)} events)")
+                return
+            except Exception as e:
+                logger.error(f"Failed to load pattern stats, rebuilding: {e}")
+        
+        columns = self._columns()
+        if len(columns["timestamp"]):
+            self._seed_pattern_stats(self._events_frame(columns))
+            self._patterns_from_stats()
+    
+    def _patterns_from_stats(self):
+        """Replace self.patterns with those of the incremental stats (seen twice or more)"""
+        self.patterns = {key: self._pattern_from_stats(stats)
+                         for key, stats in self._pattern_stats.items() if stats.seen >= 2}
+        self._rebuild_indexes()
+    
+    def _pattern_from_stats(self, stats: PatternStats) -> BehavioralPattern:
+        return BehavioralPattern(
+            person_id=stats.person_id,
+            camera=stats.camera,
+            hour_of_day=stats.hour_of_day,
+            day_of_week=stats.day_of_week,
+            avg_duration_minutes=stats.avg_duration,
+            frequency_score=self._frequency_score(stats.count),
+            position_grid=stats.grid
+        )
+    
+    def _save_pattern_stats(self):
+        """Checkpoint incremental stats (restored by _init_pattern_stats)"""
+        data = {
+            "as_of": to_epoch(self._span[1]) if self._span else 0.0,
+            "span": [t.isoformat() for t in self._span] if self._span else None,
+            "stats": {k: v.to_dict() for k, v in self._pattern_stats.items()}
+        }
+        with open(self.pattern_stats_file, 'w') as f:
+            json.dump(data, f)
+    
+    def _seed_pattern_stats(self, df: pd.DataFrame):
+        """Initialise incremental running stats from a batch of events (decay-weighted)"""
+        self._pattern_stats = self._stats_from_groups(
+            *self._group_stats(df, self.decay_half_life_days))
+        self._span = (df["timestamp"].min().to_pydatetime(),
+                      df["timestamp"].max().to_pydatetime())
+    
+    @classmethod
+    def _stats_from_groups(cls, stats: pd.DataFrame, grids: np.ndarray) -> Dict[str, PatternStats]:
+        """Incremental running stats from _group_stats output"""
+        pattern_stats = {}
+        for key, row, grid in zip(stats.index, stats.itertuples(index=False), grids):
+            camera, hour, dow, person_id = key
+            pattern_stats[cls._pattern_key(person_id, camera, hour, dow)] = PatternStats(
+                count=float(row.weight),
+                gap_sum=float(row.gap_sum),
+                gap_count=float(row.gap_count),
+                last_seen=row.last_seen.to_pydatetime(),
+                grid=grid.copy(),
+                seen=int(row.occurrences),
+                camera=camera,
+                person_id=person_id if person_id != "unknown" else None,
+                hour_of_day=int(hour),
+                day_of_week=int(dow)
+            )
+        return pattern_stats
+    
+    def _frequency_score(self, count: float) -> float:
+        """Occurrences per day over the observed (or decay-effective) window, capped at 1"""
+        if self._span is None:
+            return 0.0
+        total_days = (self._span[1] - self._span[0]).days or 1
+        if self.decay_half_life_days:
+            # Decayed counts only "remember" about half_life / ln 2 days
+            total_days = min(total_days, max(1.0, self.decay_half_life_days / np.log(2)))
+        return min(count / total_days / 10, 1.0)
+    
+    def _update_incremental(self, event: MovementEvent):
+        """O(1) update of the running stats and pattern for one event"""
+        person_id = event.person_id or "unknown"
+        hour, dow = event.timestamp.hour, event.timestamp.weekday()
+        key = self._pattern_key(person_id, event.camera, hour, dow)
+        
+        stats = self._pattern_stats.get(key)
+        if stats is None:
+            stats = self._pattern_stats[key] = PatternStats(
+                camera=event.camera, person_id=event.person_id, hour_of_day=hour, day_of_week=dow)
+        elif self.decay_half_life_days and event.timestamp > stats.last_seen:
+            elapsed_days = (event.timestamp - stats.last_seen).total_seconds() / 86400
+            stats.decay(0.5 ** (elapsed_days / self.decay_half_life_days))
+        stats.add(event.timestamp, self._event_cell(event))
+        
+        if self._span is None:
+            self._span = (event.timestamp, event.timestamp)
+        else:
+            self._span = (min(self._span[0], event.timestamp), max(self._span[1], event.timestamp))
+        
+        if stats.seen < 2:
+            return
+        pattern = self.patterns.get(key)
+        if pattern is None:
+            pattern = self.patterns[key] = self._pattern_from_stats(stats)
+            self._index_pattern(key, pattern)
+        else:
+            pattern.avg_duration_minutes = stats.avg_duration
+            pattern.frequency_score = self._frequency_score(stats.count)
+            pattern.position_grid = stats.grid
+    
+    def _index_pattern(self, key: str, pattern: BehavioralPattern):
+        self._keys_by_person[pattern.person_id].add(key)
+        self._keys_by_camera[pattern.camera].add(key)
+        self._cameras_by_person[pattern.person_id].add(pattern.camera)
+    
+    def _rebuild_indexes(self):
+        """Recompute person/camera indexes after self.patterns is replaced"""
+        self._keys_by_person.clear()
+        self._keys_by_camera.clear()
+        self._cameras_by_person.clear()
+        for key, pattern in self.patterns.items():
+            self._index_pattern(key, pattern)
+    
+    def patterns_for_person(self, person_id: Optional[str]) -> List[BehavioralPattern]:
+        """Patterns of one person (None = unidentified)"""
+        return [self.patterns[k] for k in self._keys_by_person.get(person_id, ())]
+    
+    def patterns_for_camera(self, camera: str) -> List[BehavioralPattern]:
+        """Patterns observed on one camera"""
+        return [self.patterns[k] for k in self._keys_by_camera.get(camera, ())]
+    
+    def save_patterns(self):
+        """Persist the current (e.g. incrementally updated) patterns"""
+        self._save_patterns()
+        if self.incremental:
+            self._save_pattern_stats()
+    
     def detect_anomaly(self, event: MovementEvent) -> Optional[Dict]:
         """
         Detect if a movement event is anomalous.
@@ -282,11 +902,10 @@ class BehavioralAnalyzer:
         # Check if pattern exists
         if key not in self.patterns:
             # No baseline for this camera/hour/day combination
-            # Check if person has ANY pattern
-            person_patterns = [p for p in self.patterns.values() 
-                             if p.person_id == event.person_id]
+            # Check if person has ANY pattern (index lookup, no scan)
+            person_cameras = self._cameras_by_person.get(event.person_id)
             
-            if not person_patterns:
+            if not person_cameras:
                 return {
                     "type": "unknown_person",
                     "severity": "low",
@@ -299,31 +918,53 @@ class BehavioralAnalyzer:
                     "severity": "medium",
                     "message": f"{person_id} in {event.camera} at unusual time",
                     "event": event.to_dict(),
-                    "typical_locations": list(set(p.camera for p in person_patterns))
+                    "typical_locations": list(person_cameras)
                 }
         
         pattern = self.patterns[key]
         
-        # Check if position is unusual
-        event_pos = np.array(event.position)
-        typical_positions = np.array(pattern.typical_positions)
-        
-        if len(typical_positions) > 0:
-            distances = np.linalg.norm(typical_positions - event_pos, axis=1)
-            min_distance = np.min(distances)
-            
-            # If position is far from typical positions
-            if min_distance > 0.3:  # Threshold for significant position difference
-                return {
-                    "type": "unusual_position",
-                    "severity": "low",
-                    "message": f"Unusual position in {event.camera}",
-                    "event": event.to_dict(),
-                    "distance_from_typical": float(min_distance)
-                }
+        # Check if position is unusual (occupancy lookup around the event's cell);
+        # sparse grids leave most cells empty, so wait for enough observations
+        if pattern.position_grid.sum() < self.min_position_observations:
+            return None
+        density = pattern.position_density(*self._event_cell(event))
+        if density < self.position_density_threshold:
+            return {
+                "type": "unusual_position",
+                "severity": "low",
+                "message": f"Unusual position in {event.camera}",
+                "event": event.to_dict(),
+                "position_density": round(density, 4)
+            }
         
         return None
     
+    def score_positions(self, events: List[MovementEvent]) -> np.ndarray:
+        """
+        Position density of many events at once (see position_density_threshold).
+        
+        Returns:
+            Array aligned with events; NaN where no pattern matches or the
+            pattern has fewer than min_position_observations observations
+        """
+        scores = np.full(len(events), np.nan)
+        by_key = defaultdict(list)
+        for i, e in enumerate(events):
+            key = self._pattern_key(e.person_id or "unknown", e.camera,
+                                    e.timestamp.hour, e.timestamp.weekday())
+            by_key[key].append(i)
+        
+        positions = np.array([e.position for e in events], dtype=np.float64).reshape(-1, 2)
+        for key, indices in by_key.items():
+            pattern = self.patterns.get(key)
+            if pattern is None or pattern.position_grid.sum() < self.min_position_observations:
+                continue
+            indices = np.asarray(indices)
+            rows, cols = position_cells(positions[indices, 0], positions[indices, 1],
+                                        *self._frame_size(pattern.camera))
+            scores[indices] = pattern.density_map()[rows, cols]
+        return scores
+    
     def get_daily_summary(self, date: Optional[datetime] = None) -> Dict:
         """
         Get summary of activity for a specific day.
@@ -340,38 +981,41 @@ class BehavioralAnalyzer:
         start = date.replace(hour=0, minute=0, second=0, microsecond=0)
         end = start + timedelta(days=1)
         
-        day_events = [e for e in self.events 
-                     if start <= e.timestamp < end]
+        columns = self._columns(["timestamp", "camera", "person"], to_epoch(start), to_epoch(end))
         
-        if not day_events:
+        if not len(columns["timestamp"]):
             return {"message": "No activity recorded for this day"}
         
-        df = pd.DataFrame([
-            {"camera": e.camera, "hour": e.timestamp.hour, 
-             "person_id": e.person_id or "unknown"}
-            for e in day_events
-        ])
+        hours, hour_counts = np.unique(hours_of_day(columns["timestamp"]), return_counts=True)
+        cameras, camera_counts = np.unique(columns["camera"], return_counts=True)
+        camera_names = self.events.camera_names(cameras)
+        persons = self.events.person_names(np.unique(columns["person"]), missing="unknown")
         
         return {
             "date": start.strftime("%Y-%m-%d"),
-            "total_events": len(day_events),
-            "unique_cameras": df['camera'].unique().tolist(),
-            "hourly_activity": df.groupby('hour').size().to_dict(),
-            "camera_activity": df.groupby('camera').size().to_dict(),
-            "persons_detected": df['person_id'].unique().tolist()
+            "total_events": len(columns["timestamp"]),
+            "unique_cameras": camera_names.tolist(),
+            "hourly_activity": {int(h): int(n) for h, n in zip(hours, hour_counts)},
+            "camera_activity": {name: int(n) for name, n in zip(camera_names, camera_counts)},
+            "persons_detected": persons.tolist()
         }
     
     def has_sufficient_baseline(self) -> bool:
         """Check if we have enough data for anomaly detection"""
-        if not self.events:
+        time_range = self._time_range()
+        if time_range is None:
             return False
         
-        date_range = self.events[-1].timestamp - self.events[0].timestamp
-        return date_range.days >= self.min_baseline_days
+        return (time_range[1] - time_range[0]).days >= self.min_baseline_days
     
     def export_for_training(self, output_path: Optional[Path] = None) -> Path:
         """
-        Export behavioral data for model training.
+        Export behavioral data for model training as NDJSON.
+        
+        The first line is {"type": "metadata", ...}, followed by one
+        {"type": "pattern", ...} line per pattern and one {"type": "event", ...}
+        line per event. Events are streamed a few days at a time from the
+        archive, so memory use does not grow with history length.
         
         Args:
             output_path: Export destination
@@ -380,29 +1024,49 @@ class BehavioralAnalyzer:
             Path to exported file
         """
         if output_path is None:
-            output_path = self.data_dir / "behavioral_training_data.json"
+            output_path = self.data_dir / "behavioral_training_data.ndjson"
         
-        data = {
-            "events": [e.to_dict() for e in self.events],
-            "patterns": {k: asdict(v) for k, v in self.patterns.items()},
-            "metadata": {
+        time_range = self._time_range()
+        total_events = 0
+        with open(output_path, 'w') as f:
+            f.write(json.dumps({
+                "type": "metadata",
                 "exported_at": datetime.now().isoformat(),
-                "total_events": len(self.events),
+                "total_events": self.event_count(),
                 "total_patterns": len(self.patterns),
                 "date_range": {
-                    "start": self.events[0].timestamp.isoformat() if self.events else None,
-                    "end": self.events[-1].timestamp.isoformat() if self.events else None
+                    "start": time_range[0].isoformat() if time_range else None,
+                    "end": time_range[1].isoformat() if time_range else None
                 }
-            }
-        }
-        
-        with open(output_path, 'w') as f:
-            json.dump(data, f, indent=2)
+            }) + "\n")
+            
+            for key, pattern in self.patterns.items():
+                f.write(json.dumps({"type": "pattern", "key": key, **pattern.to_dict()}) + "\n")
+            
+            if time_range is not None:
+                step = 86400 * BEHAVIORAL_CONFIG.get("export_chunk_days", 1)
+                start = to_epoch(time_range[0].replace(hour=0, minute=0, second=0, microsecond=0))
+                end = to_epoch(time_range[1])
+                while start <= end:
+                    columns = self._columns(start=start, end=start + step)
+                    order = np.argsort(columns["timestamp"], kind="stable")
+                    cameras = self.events.camera_names(columns["camera"][order])
+                    persons = self.events.person_names(columns["person"][order])
+                    f.writelines(
+                        json.dumps({"type": "event", **MovementEvent(
+                            from_epoch(columns["timestamp"][i]), camera, person,
+                            (float(columns["x"][i]), float(columns["y"][i])),
+                            float(columns["confidence"][i])
+                        ).to_dict()}) + "\n"
+                        for i, camera, person in zip(order, cameras, persons)
+                    )
+                    total_events += len(order)
+                    start += step
         
-        logger.info(f"Exported behavioral data to {output_path}")
+        logger.info(f"Exported {total_events} events and {len(self.patterns)} patterns "
+                    f"to {output_path}")
         return output_path
 
-
 if __name__ == "__main__":
     # Test the behavioral analyzer
     import tempfile
@@ -430,13 +1094,45 @@ if __name__ == "__main__":
             timestamp=now,
             camera="sala",
             person_id="person_1",
-            position=(0.5, 0.5),
+            position=(150.0, 200.0),
             confidence=0.9
         )
         
         anomaly = analyzer.detect_anomaly(test_event)
         print("Anomaly check:", anomaly)
         
+        # Compaction archives past days and drops them from memory
+        analyzer.flush()
+        total, in_memory = analyzer.event_count(), len(analyzer.events)
+        assert total == 20  # Past-day events are visible before they are archived
+        analyzer.compact()
+        today = to_epoch(now.replace(hour=0, minute=0, second=0, microsecond=0))
+        assert analyzer.event_count() == total
+        analyzer.compact()  # Idempotent
+        assert analyzer.event_count() == total
+        assert len(analyzer.events) == analyzer.events.count(start=today) <= in_memory
+        print(f"Compaction: {in_memory} -> {len(analyzer.events)} events in memory, "
+              f"{analyzer.archive.count} archived")
+        
         # Daily summary
         daily = analyzer.get_daily_summary()
         print("Daily summary:", json.dumps(daily, indent=2))
+        
+        analyzer.close()
+        print("Writer stats:", analyzer.writer.get_stats())
+    
+    # Incremental patterns survive a restart
+    with tempfile.TemporaryDirectory() as tmpdir:
+        analyzer = BehavioralAnalyzer(tmpdir, incremental=True)
+        now = datetime.now()
+        for i in range(4):
+            analyzer.record_movement("sala", [100, 100, 200, 300], 0.85, "person_1",
+                                     timestamp=now - timedelta(minutes=i))
+        learned = sorted(analyzer.patterns)
+        analyzer.close()
+        
+        restarted = BehavioralAnalyzer(tmpdir, incremental=True)
+        assert learned and sorted(restarted.patterns) == learned
+        assert restarted.patterns_for_person("person_1")
+        restarted.close()
+        print(f"Restart: {len(learned)} incremental patterns restored")
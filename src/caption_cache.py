@@ -0,0 +1,113 @@
+"""Caption Cache Module - Reuse VLM captions for visually unchanged scenes"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+import cv2
+import numpy as np
+
+from frame import Frame
+
+logger = logging.getLogger(__name__)
+
+
+def perceptual_hash(image: Union[Path, str, np.ndarray, Frame]) -> Optional[int]:
+    """
+    64-bit DCT perceptual hash (pHash) of an image.
+
+    Near-identical frames (sensor noise, small lighting drift) hash within
+    a few bits of each other.
+    """
+    if isinstance(image, Frame):
+        image = image.image
+    if isinstance(image, np.ndarray):
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    else:
+        gray = cv2.imread(str(image), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        if gray is None:
+            return None
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    bits = low > np.median(low[1:])  # Ignore DC term when picking the threshold
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+@dataclass
+class CachedCaption:
+    phash: int
+    objects: Tuple[Tuple[str, int], ...]
+    caption: str
+    created: float
+
+
+class CaptionCache:
+    """
+    Per-camera LRU/TTL cache of captions keyed by perceptual hash.
+
+    A lookup hits when a recent entry from the same camera is within
+    `max_hamming` bits of the frame's hash and saw the same object multiset.
+    """
+
+    def __init__(self, max_hamming: int = 6, max_entries_per_camera: int = 32,
+                 ttl_seconds: float = 600):
+        self.max_hamming = max_hamming
+        self.max_entries = max_entries_per_camera
+        self.ttl = ttl_seconds
+        self._entries: Dict[str, "OrderedDict[tuple, CachedCaption]"] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def objects_key(object_counts: Dict[str, int]) -> Tuple[Tuple[str, int], ...]:
+        """Order-independent key for a class -> count mapping"""
+        return tuple(sorted(object_counts.items()))
+
+    def get(self, camera: str, phash: int,
+            objects: Tuple[Tuple[str, int], ...]) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            entries = self._entries.get(camera)
+            if entries:
+                # Drop expired entries (oldest first)
+                while entries:
+                    oldest = next(iter(entries.values()))
+                    if now - oldest.created <= self.ttl:
+                        break
+                    entries.popitem(last=False)
+                for key, entry in reversed(entries.items()):
+                    if (entry.objects == objects and now - entry.created <= self.ttl and
+                            (entry.phash ^ phash).bit_count() <= self.max_hamming):
+                        entries.move_to_end(key)
+                        self.hits += 1
+                        return entry.caption
+            self.misses += 1
+            return None
+
+    def put(self, camera: str, phash: int, objects: Tuple[Tuple[str, int], ...], caption: str):
+        with self._lock:
+            entries = self._entries.setdefault(camera, OrderedDict())
+            key = (phash, objects)
+            entries[key] = CachedCaption(phash, objects, caption, time.monotonic())
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def clear(self, camera: Optional[str] = None):
+        with self._lock:
+            if camera is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(camera, None)
+
+    def get_stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": sum(len(e) for e in self._entries.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
@@ -0,0 +1,220 @@
+"""Caption Queue Module - Background VLM captioning off the detection path"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from frame import Frame
+from detector import DetectionBatch
+from config import MODEL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_PERSON = 0
+PRIORITY_OTHER = 1
+
+
+@dataclass(order=True)
+class CaptionJob:
+    """One frame waiting for a caption (heap-ordered by priority, then age)"""
+    priority: int
+    seq: int
+    image: Any = field(compare=False)
+    detections: Any = field(compare=False)
+    camera: Optional[str] = field(compare=False)
+    callback: Callable[[str], None] = field(compare=False)
+    enqueued: float = field(compare=False, default_factory=time.monotonic)
+
+
+class CaptionQueue:
+    """
+    Bounded priority queue feeding a background captioning thread.
+
+    Frames with people are captioned first. When the queue is full the
+    least important, oldest job is evicted; when it is backed up, a new
+    person-free frame replaces older person-free frames from the same
+    camera; jobs older than max_age_seconds are dropped unprocessed. Each
+    caption is handed to the job's callback from the worker thread.
+
+    The worker waits up to max_wait_seconds for batch_size jobs to queue,
+    so frames from several cameras share one VLM call.
+    """
+
+    def __init__(self, scene,
+                 max_size: Optional[int] = None,
+                 max_age_seconds: Optional[float] = None,
+                 batch_size: Optional[int] = None,
+                 max_wait_seconds: Optional[float] = None,
+                 max_side: int = 640):
+        """
+        Args:
+            scene: SceneUnderstanding (or remote client) used for captions
+            max_size: Maximum queued jobs
+            max_age_seconds: Jobs older than this are dropped as stale
+            batch_size: Jobs captioned per VLM call
+            max_wait_seconds: Longest the oldest job waits for a batch to fill
+            max_side: Frames are downscaled to this long side while queued
+        """
+        queue_config = MODEL_CONFIG["vlm"].get("caption_queue", {})
+        self.scene = scene
+        self.max_size = max_size or queue_config.get("max_size", 32)
+        self.max_age = max_age_seconds or queue_config.get("max_age_seconds", 60)
+        self.batch_size = batch_size or MODEL_CONFIG["vlm"].get("max_batch_size", 8)
+        self.max_wait = (max_wait_seconds if max_wait_seconds is not None
+                         else MODEL_CONFIG["vlm"].get("max_wait_ms", 200) / 1000)
+        self.max_side = max_side
+
+        self._heap: List[CaptionJob] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running = True
+        self._unfinished = 0  # Queued + in-flight jobs
+        self.stats = {"submitted": 0, "captioned": 0, "evicted": 0,
+                      "coalesced": 0, "stale": 0, "errors": 0}
+        self._latency_total = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="caption-queue", daemon=True)
+        self._thread.start()
+
+    def submit(self, image, detections, callback: Callable[[str], None],
+               camera: Optional[str] = None) -> bool:
+        """
+        Queue a frame for captioning.
+
+        Returns:
+            False if the frame was dropped because the queue is full of
+            more important work
+        """
+        if isinstance(image, Frame):
+            camera = camera or image.camera
+            image = image.downscaled(self.max_side)
+        has_person = len(DetectionBatch.coerce(detections).persons()) > 0
+        job = CaptionJob(
+            priority=PRIORITY_PERSON if has_person else PRIORITY_OTHER,
+            seq=next(self._seq),
+            image=image,
+            detections=detections,
+            camera=camera,
+            callback=callback
+        )
+
+        with self._cond:
+            if not self._running:
+                return False
+            self.stats["submitted"] += 1
+
+            # Backed up: keep only the newest person-free frame per camera
+            if (job.priority == PRIORITY_OTHER and camera is not None
+                    and len(self._heap) >= self.max_size // 2):
+                kept = [j for j in self._heap
+                        if not (j.priority == PRIORITY_OTHER and j.camera == camera)]
+                self.stats["coalesced"] += len(self._heap) - len(kept)
+                self._unfinished -= len(self._heap) - len(kept)
+                if len(kept) != len(self._heap):
+                    self._heap = kept
+                    heapq.heapify(self._heap)
+
+            if len(self._heap) >= self.max_size:
+                # Evict the least important, oldest job - unless that's the new one
+                worst = max(self._heap, key=lambda j: (j.priority, -j.seq))
+                if (job.priority, -job.seq) >= (worst.priority, -worst.seq):
+                    self.stats["evicted"] += 1
+                    return False
+                self._heap.remove(worst)
+                heapq.heapify(self._heap)
+                self.stats["evicted"] += 1
+                self._unfinished -= 1
+
+            heapq.heappush(self._heap, job)
+            self._unfinished += 1
+            self._cond.notify_all()
+        return True
+
+    def _next_batch(self) -> List[CaptionJob]:
+        """Pop up to batch_size jobs, dropping stale ones (caller holds the lock)"""
+        batch = []
+        now = time.monotonic()
+        while self._heap and len(batch) < self.batch_size:
+            job = heapq.heappop(self._heap)
+            if now - job.enqueued > self.max_age:
+                self.stats["stale"] += 1
+                self._unfinished -= 1
+                continue
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._heap:
+                    self._cond.wait()
+                if not self._running and not self._heap:
+                    return
+                # Collection window: let other cameras' frames join the batch
+                deadline = min(j.enqueued for j in self._heap) + self.max_wait
+                while (self._running and 0 < len(self._heap) < self.batch_size
+                       and time.monotonic() < deadline):
+                    self._cond.wait(deadline - time.monotonic())
+                batch = self._next_batch()
+                self._cond.notify_all()
+            if not batch:
+                continue
+
+            try:
+                self._caption(batch)
+            finally:
+                with self._cond:
+                    self._unfinished -= len(batch)
+                    self._cond.notify_all()
+
+    def _caption(self, batch: List[CaptionJob]):
+        """Caption a batch and hand results to the callbacks"""
+        try:
+            captions = self.scene.describe_with_objects_batch(
+                [j.image for j in batch], [j.detections for j in batch],
+                [j.camera for j in batch]
+            )
+        except Exception as e:
+            logger.error(f"Background captioning failed: {e}")
+            self.stats["errors"] += len(batch)
+            return
+
+        done = time.monotonic()
+        for job, caption in zip(batch, captions):
+            self._latency_total += done - job.enqueued
+            self.stats["captioned"] += 1
+            try:
+                job.callback(caption)
+            except Exception as e:
+                logger.error(f"Caption callback failed: {e}")
+                self.stats["errors"] += 1
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued job has been captioned or dropped"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def get_stats(self) -> Dict:
+        captioned = self.stats["captioned"]
+        return {
+            **self.stats,
+            "depth": self.depth(),
+            "avg_latency_seconds": round(self._latency_total / captioned, 3) if captioned else 0.0
+        }
+
+    def close(self, drain: bool = True):
+        """Stop the worker; with drain=True, caption what is still queued first"""
+        with self._cond:
+            if not drain:
+                self._unfinished -= len(self._heap)
+                self._heap.clear()
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join()
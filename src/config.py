@@ -12,17 +12,33 @@ CAMERAS = {
     "sala": {
         "ip": "192.168.86.23",
         "location": "Sala de estar",
-        "zones": ["entrada", "sofa", "janela"]
+        "zones": ["entrada", "sofa", "janela"],
+        "motion_threshold": 0.02,  # Fraction of changed pixels that triggers detection
+        # Optional "frame_size": [width, height] for behavioral position grids;
+        # learned from the first decoded frame when omitted
+        # full | zones | tiled. "zones" infers only on crops over active_zones;
+        # "tiled" (opt-in) runs several inferences per frame to find small people;
+        # polygons are normalized (0-1) [x, y] points, e.g.
+        # "zone_polygons": {"sofa": [[0.4, 0.5], [0.9, 0.5], [0.9, 1.0], [0.4, 1.0]]}
+        "detection_mode": "full",
+        "zone_polygons": {},
+        "active_zones": None  # None = every zone with a polygon
     },
     "cozinha": {
         "ip": "192.168.86.51",
         "location": "Cozinha",
-        "zones": ["porta", "balcao", "mesa"]
+        "zones": ["porta", "balcao", "mesa"],
+        "motion_threshold": 0.02,
+        "detection_mode": "full",
+        "zone_polygons": {},
+        "active_zones": None
     },
     "exterior": {
         "ip": "192.168.86.78",
         "location": "Exterior",
         "zones": ["entrada", "jardim", "portao"],
+        "motion_threshold": 0.05,  # Foliage and lighting change more outside
+        "detection_mode": "full",  # "tiled" finds distant people at several times the cost
         "status": "pending"  # Not responding yet
     }
 }
@@ -42,13 +58,42 @@ MODEL_CONFIG = {
         "model": "yolo11n.pt",  # nano = fastest
         "conf_threshold": 0.5,
         "classes": ["person", "dog", "cat", "backpack", "handbag", "suitcase", 
-                   "bottle", "cup", "laptop", "cell phone", "book"]
+                   "bottle", "cup", "laptop", "cell phone", "book"],
+        "restrict_classes": True,  # Only infer the classes above
+        "cache_size": 256,  # Detection results cached per file (path + mtime + size)
+        "backend": "pytorch",  # pytorch | onnx | openvino (CPU runtimes, exported once)
+        "export_dir": MODELS_DIR / "exported",
+        "imgsz": 640,
+        "zone_imgsz": 320,  # Input size for zone crops (detection_mode "zones")
+        "tile_size": 640  # Tile edge in pixels (detection_mode "tiled")
     },
     # VLM for scene understanding
     "vlm": {
         "model": "minicpm-v-2_6",  # Will download quantized version
         "context_length": 4096,
-        "temperature": 0.7
+        "temperature": 0.7,
+        "max_batch_size": 8,  # Frames per BLIP generate() call
+        "max_wait_ms": 200,  # How long the caption queue waits to fill a batch
+        # CPU-only hosts: int8 BLIP, bounded torch threads, warm-up generate at load
+        "cpu_profile": {
+            "quantize_int8": True,
+            # torch threads for the whole in-process pipeline (YOLO and embedder
+            # too); model server workers use threads_per_worker instead
+            "num_threads": 2,
+            "warmup": True
+        },
+        "async_captions": True,  # Caption in a background queue, off the alert path
+        "caption_queue": {
+            "max_size": 32,  # Queued frames (people first; oldest/empty frames dropped)
+            "max_age_seconds": 60  # Frames waiting longer are dropped as stale
+        },
+        # Reuse captions for frames that look unchanged (pHash) with the same objects
+        "caption_cache": {
+            "enabled": True,
+            "max_hamming": 6,  # Max differing bits of the 64-bit pHash
+            "max_entries_per_camera": 32,
+            "ttl_seconds": 600
+        }
     },
     # Embedding model for semantic search
     "embeddings": {
@@ -57,10 +102,47 @@ MODEL_CONFIG = {
     }
 }
 
+# Shared model server (one process pool serving every monitor)
+INFERENCE_SERVER = {
+    "enabled": False,  # Monitors fall back to in-process models when off/unreachable
+    # Private (0700) directory: connections unpickle, so only this user may connect
+    "socket_path": DATA_DIR / "model_server" / "models.sock",
+    "authkey_file": DATA_DIR / "model_server" / "authkey",  # Random, 0600, made on first start
+    "workers": 2,  # Worker processes; each loads the models once
+    "threads_per_worker": None,  # torch threads per worker (None = cores / workers)
+    "caption": True,  # Also serve SceneUnderstanding
+    "request_timeout": 120
+}
+
+# Behavioral event persistence
+BEHAVIORAL_CONFIG = {
+    "writer": {
+        "max_buffer": 256,  # Flush once this many events are buffered...
+        "flush_interval": 2.0,  # ...or after this many seconds
+        "fsync": "interval",  # "never", "flush" (every flush) or "interval"
+        "fsync_interval": 30.0
+    },
+    "baseline_workers": None,  # Processes for build_baseline (None = one per camera, up to cores)
+    "parallel_min_events": 200_000,  # Smaller baselines are built in-process
+    "export_chunk_days": 1  # Days of events read per step by export_for_training
+}
+
 # Vector Database
 CHROMA_CONFIG = {
     "persist_directory": str(DATA_DIR / "chroma_db"),
-    "collection_name": "vigilhome_events"
+    "collection_name": "vigilhome_events",
+    # Background indexing (VigilHome): batch by count or age, bounded backlog
+    "index_queue": {
+        "enabled": True,
+        "max_size": 1024,
+        "batch_size": 32,
+        "max_wait_seconds": 2.0,
+        # Failed batches are retried with doubling delays; events still failing
+        # (or dropped from a full queue) are spilled here and re-queued on start
+        "max_retries": 3,
+        "retry_backoff_seconds": 1.0,
+        "spill_file": DATA_DIR / "index_queue_spill.jsonl"
+    }
 }
 
 # Feature Flags
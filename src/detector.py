@@ -2,69 +2,580 @@
 import cv2
 import numpy as np
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Sequence, Union, Optional, Iterable
+from collections import abc, OrderedDict
+import os
+import shutil
+import importlib.util
+import threading
 import logging
 
+from frame import Frame
+from config import MODEL_CONFIG, MODELS_DIR, CAMERAS
+from zones import zone_rects, tile_rects, points_in_polygons, nms, active_polygons, Rect
+
 logger = logging.getLogger(__name__)
 
+ImageInput = Union[Path, str, np.ndarray, Frame]
+
+
+class DetectionBatch(abc.Sequence):
+    """
+    Columnar detections for one image.
+    
+    Boxes, confidences and class ids live in NumPy arrays so filtering and
+    counting are vectorized. Indexing/iterating yields the legacy detection
+    dicts (class, confidence, bbox) for existing consumers.
+    """
+    
+    __slots__ = ("boxes", "confidences", "class_ids", "names", "_name_to_id")
+    
+    def __init__(self, boxes, confidences, class_ids, names: Dict[int, str]):
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)  # [x1, y1, x2, y2]
+        self.confidences = np.asarray(confidences, dtype=np.float32).reshape(-1)
+        self.class_ids = np.asarray(class_ids, dtype=np.int32).reshape(-1)
+        self.names = names
+        self._name_to_id = None
+    
+    @classmethod
+    def empty(cls, names: Optional[Dict[int, str]] = None) -> "DetectionBatch":
+        return cls(np.empty((0, 4)), np.empty(0), np.empty(0), names or {})
+    
+    @classmethod
+    def from_result(cls, result) -> "DetectionBatch":
+        """Build from one ultralytics result without per-box Python work"""
+        boxes = result.boxes
+        return cls(
+            boxes.xyxy.cpu().numpy(),
+            boxes.conf.cpu().numpy(),
+            boxes.cls.cpu().numpy(),
+            result.names
+        )
+    
+    @classmethod
+    def from_dicts(cls, detections: Iterable[Dict]) -> "DetectionBatch":
+        """Build from legacy detection dicts"""
+        detections = list(detections)
+        name_to_id: Dict[str, int] = {}
+        for d in detections:
+            name_to_id.setdefault(d["class"], len(name_to_id))
+        return cls(
+            [d.get("bbox", [0.0, 0.0, 0.0, 0.0]) for d in detections] or np.empty((0, 4)),
+            [d.get("confidence", 0.0) for d in detections],
+            [name_to_id[d["class"]] for d in detections],
+            {i: name for name, i in name_to_id.items()}
+        )
+    
+    @classmethod
+    def concat(cls, batches: Sequence["DetectionBatch"],
+               names: Optional[Dict[int, str]] = None) -> "DetectionBatch":
+        """Join several batches (same class-id space) into one"""
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls.empty(names)
+        return cls(np.concatenate([b.boxes for b in batches]),
+                   np.concatenate([b.confidences for b in batches]),
+                   np.concatenate([b.class_ids for b in batches]),
+                   names or batches[0].names)
+    
+    @classmethod
+    def coerce(cls, detections) -> "DetectionBatch":
+        """Return `detections` as a DetectionBatch (no copy if it already is one)"""
+        if isinstance(detections, cls):
+            return detections
+        return cls.from_dicts(detections or [])
+    
+    def class_id(self, name: str) -> Optional[int]:
+        """Model class id for a class name (None if unknown)"""
+        if self._name_to_id is None:
+            self._name_to_id = {v: k for k, v in self.names.items()}
+        return self._name_to_id.get(name)
+    
+    def _subset(self, mask: np.ndarray) -> "DetectionBatch":
+        return DetectionBatch(self.boxes[mask], self.confidences[mask],
+                              self.class_ids[mask], self.names)
+    
+    def offset(self, dx: float, dy: float) -> "DetectionBatch":
+        """Shift boxes by (dx, dy), e.g. from crop back to full-frame coordinates"""
+        shift = np.array([dx, dy, dx, dy], dtype=np.float32)
+        return DetectionBatch(self.boxes + shift, self.confidences, self.class_ids, self.names)
+    
+    def centers(self) -> np.ndarray:
+        """Nx2 box centers"""
+        return (self.boxes[:, :2] + self.boxes[:, 2:]) / 2
+    
+    def filter(self, min_conf: float) -> "DetectionBatch":
+        """Detections with confidence >= min_conf"""
+        return self._subset(self.confidences >= min_conf)
+    
+    def of_class(self, name: str) -> "DetectionBatch":
+        """Detections of a single class"""
+        cid = self.class_id(name)
+        if cid is None:
+            return self._subset(np.zeros(len(self), dtype=bool))
+        return self._subset(self.class_ids == cid)
+    
+    def of_classes(self, names: Iterable[str]) -> "DetectionBatch":
+        """Detections whose class is in `names`"""
+        ids = [cid for cid in (self.class_id(n) for n in names) if cid is not None]
+        return self._subset(np.isin(self.class_ids, ids))
+    
+    def persons(self) -> "DetectionBatch":
+        return self.of_class("person")
+    
+    def count_by_class(self) -> Dict[str, int]:
+        """Class name -> count, in order of first appearance"""
+        if not len(self):
+            return {}
+        ids, first, counts = np.unique(self.class_ids, return_index=True, return_counts=True)
+        order = np.argsort(first)
+        return {self.names[int(ids[i])]: int(counts[i]) for i in order}
+    
+    def class_names(self) -> set:
+        """Set of class names present"""
+        return {self.names[int(c)] for c in np.unique(self.class_ids)}
+    
+    def to_dicts(self) -> List[Dict]:
+        """Legacy list-of-dicts view"""
+        boxes = self.boxes.tolist()
+        confs = self.confidences.tolist()
+        return [
+            {"class": self.names[c], "confidence": confs[i], "bbox": boxes[i]}
+            for i, c in enumerate(self.class_ids.tolist())
+        ]
+    
+    def __len__(self) -> int:
+        return len(self.class_ids)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._subset(np.arange(len(self))[index])
+        return {
+            "class": self.names[int(self.class_ids[index])],
+            "confidence": float(self.confidences[index]),
+            "bbox": self.boxes[index].tolist()
+        }
+    
+    def __iter__(self):
+        return iter(self.to_dicts())
+    
+    def __repr__(self) -> str:
+        return f"DetectionBatch({len(self)} detections: {self.count_by_class()})"
+
+
+def _box_iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """IoU of one xyxy box against an Nx4 array of boxes"""
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / np.maximum(area + areas - inter, 1e-9)
+
+
+class DetectionCache:
+    """
+    Bounded LRU cache of detection results keyed by file identity.
+    
+    Keys combine the model/threshold with (path, mtime, size), so a frame
+    rewritten on disk is never served stale. Each entry remembers which
+    classes the inference was restricted to (None = all classes); a lookup
+    is a hit when the cached run covered every class requested.
+    """
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Tuple[Optional[frozenset], DetectionBatch]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: tuple, classes: Optional[frozenset]) -> Optional[DetectionBatch]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                cached_classes, batch = entry
+                if cached_classes is None or (classes is not None and classes <= cached_classes):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    if classes is not None and classes != cached_classes:
+                        return batch.of_classes(classes)
+                    return batch
+            self.misses += 1
+            return None
+    
+    def put(self, key: tuple, classes: Optional[frozenset], batch: DetectionBatch):
+        with self._lock:
+            entry = self._entries.get(key)
+            # Never replace a broader result with a narrower one
+            if entry is not None and entry[0] is None and classes is not None:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = (classes, batch)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+
+# Cache for every detector in this process. Separate processes (monitors,
+# model server workers) each have their own; they share results only
+# through the model server's cache
+shared_cache = DetectionCache(MODEL_CONFIG["yolo"].get("cache_size", 256))
+
+
 class ObjectDetector:
     """YOLO-based object detector optimized for surveillance"""
     
-    def __init__(self, model_path: str = "yolo11n.pt", conf_threshold: float = 0.5):
+    # Runtime -> (ultralytics export format, artifact suffix)
+    BACKENDS = {
+        "pytorch": (None, ".pt"),
+        "onnx": ("onnx", ".onnx"),
+        "openvino": ("openvino", "_openvino_model"),
+    }
+    # Runtime -> package that must be installed to load (and export) it
+    RUNTIME_PACKAGES = {
+        "onnx": "onnxruntime",
+        "openvino": "openvino",
+    }
+    
+    def __init__(self, model_path: str = "yolo11n.pt", conf_threshold: float = 0.5,
+                 classes: Optional[Sequence[str]] = None,
+                 cache: Optional[DetectionCache] = shared_cache,
+                 backend: Optional[str] = None):
+        """
+        Args:
+            model_path: YOLO weights
+            conf_threshold: Minimum detection confidence
+            classes: Restrict inference to these class names (None = all)
+            cache: Result cache (shared_cache, per process, by default; None disables caching)
+            backend: "pytorch", "onnx" or "openvino" (default: MODEL_CONFIG['yolo']['backend'])
+        """
         self.conf_threshold = conf_threshold
         self.model = None
         self.model_path = model_path
+        self.classes = frozenset(classes) if classes else None
+        self.cache = cache
+        self.backend = backend or MODEL_CONFIG["yolo"].get("backend", "pytorch")
+        if self.backend not in self.BACKENDS:
+            raise ValueError(f"Unknown detector backend: {self.backend}")
+        package = self.RUNTIME_PACKAGES.get(self.backend)
+        if package and importlib.util.find_spec(package) is None:
+            raise ImportError(f"Detector backend '{self.backend}' needs {package}: "
+                              f"pip install {package}")
         self._load_model()
     
     def _load_model(self):
-        """Load YOLO model"""
+        """Load YOLO model (exporting it for the configured runtime if needed)"""
         try:
             from ultralytics import YOLO
-            self.model = YOLO(self.model_path)
-            logger.info(f"Loaded YOLO model: {self.model_path}")
+            weights = self.model_path
+            if self.backend != "pytorch":
+                weights = self._export_model()
+            self.model = YOLO(weights, task="detect")
+            self._name_to_id = {name: cid for cid, name in self.model.names.items()}
+            logger.info(f"Loaded YOLO model: {weights} ({self.backend})")
         except Exception as e:
             logger.error(f"Failed to load YOLO: {e}")
             raise
     
-    def detect(self, image_path: Path) -> List[Dict]:
+    def _export_model(self) -> str:
+        """Export the PyTorch weights once and reuse the cached artifact"""
+        from ultralytics import YOLO
+        export_format, suffix = self.BACKENDS[self.backend]
+        yolo_config = MODEL_CONFIG["yolo"]
+        export_dir = Path(yolo_config.get("export_dir", MODELS_DIR / "exported"))
+        imgsz = yolo_config.get("imgsz", 640)
+        target = export_dir / f"{Path(self.model_path).stem}_{imgsz}{suffix}"
+        
+        if target.exists():
+            return str(target)
+        
+        logger.info(f"Exporting {self.model_path} to {self.backend} (one-off)...")
+        export_dir.mkdir(parents=True, exist_ok=True)
+        # dynamic=True keeps the batch axis free for detect_batch()
+        exported = YOLO(self.model_path).export(format=export_format, imgsz=imgsz,
+                                                dynamic=True, half=False)
+        shutil.move(str(exported), str(target))
+        logger.info(f"Exported detector cached at {target}")
+        return str(target)
+    
+    def check_parity(self, images: Sequence[ImageInput],
+                     iou_threshold: float = 0.9, conf_tolerance: float = 0.05) -> Dict:
+        """
+        Compare this backend against the PyTorch reference on sample images.
+        
+        Every reference box must have a same-class match with IoU >= iou_threshold
+        and confidence within conf_tolerance (and no extra boxes).
+        
+        Returns:
+            Report dict with per-image mismatches and an overall `ok` flag
+        """
+        reference = ObjectDetector(self.model_path, self.conf_threshold,
+                                   classes=self.classes, cache=None, backend="pytorch")
+        expected = reference.detect_batch(images, classes=self.classes)
+        actual = [self.detect(img, classes=self.classes) for img in images]
+        
+        mismatches = []
+        for i, (ref, out) in enumerate(zip(expected, actual)):
+            if ref.count_by_class() != out.count_by_class():
+                mismatches.append({"image": i, "reason": "class counts differ",
+                                   "expected": ref.count_by_class(),
+                                   "actual": out.count_by_class()})
+                continue
+            for j in range(len(ref)):
+                same_class = out.class_ids == ref.class_ids[j]
+                if not same_class.any():
+                    continue
+                ious = _box_iou(ref.boxes[j], out.boxes[same_class])
+                best = int(np.argmax(ious))
+                conf_diff = abs(float(out.confidences[same_class][best] - ref.confidences[j]))
+                if ious[best] < iou_threshold or conf_diff > conf_tolerance:
+                    mismatches.append({"image": i, "reason": "box/confidence drift",
+                                       "class": ref.names[int(ref.class_ids[j])],
+                                       "iou": round(float(ious[best]), 4),
+                                       "conf_diff": round(conf_diff, 4)})
+        
+        report = {"backend": self.backend, "images": len(images),
+                  "mismatches": mismatches, "ok": not mismatches}
+        log = logger.info if report["ok"] else logger.warning
+        log(f"Parity {self.backend} vs pytorch: {len(mismatches)} mismatches on {len(images)} images")
+        return report
+    
+    def _resolve_classes(self, classes: Optional[Sequence[str]]) -> Optional[frozenset]:
+        """Requested class names, falling back to the detector default"""
+        if classes is None:
+            return self.classes
+        return frozenset(classes)
+    
+    def _class_ids(self, classes: Optional[frozenset]) -> Optional[List[int]]:
+        """Model class ids for ultralytics' `classes` argument"""
+        if classes is None:
+            return None
+        return sorted(self._name_to_id[c] for c in classes if c in self._name_to_id)
+    
+    def _cache_key(self, image: ImageInput) -> Optional[tuple]:
+        """Cache key from file identity, or None for in-memory arrays"""
+        if self.cache is None:
+            return None
+        path = image.path if isinstance(image, Frame) else image
+        if path is None or isinstance(path, np.ndarray):
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (str(self.model_path), self.backend, self.conf_threshold,
+                os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    
+    def detect(self, image_path: ImageInput,
+               classes: Optional[Sequence[str]] = None) -> DetectionBatch:
         """
         Detect objects in image
         
+        Args:
+            image_path: Image path, decoded BGR array or Frame
+            classes: Restrict inference to these class names (default: detector's classes)
+        
         Returns:
-            List of detections with keys: class, confidence, bbox
+            DetectionBatch (iterates as dicts with keys: class, confidence, bbox)
         """
         if not self.model:
-            return []
+            return DetectionBatch.empty()
+        
+        wanted = self._resolve_classes(classes)
+        key = self._cache_key(image_path)
+        if key is not None:
+            cached = self.cache.get(key, wanted)
+            if cached is not None:
+                return cached
         
         try:
-            results = self.model(str(image_path), conf=self.conf_threshold)
-            detections = []
-            
-            for result in results:
-                boxes = result.boxes
-                for box in boxes:
-                    detection = {
-                        "class": result.names[int(box.cls)],
-                        "confidence": float(box.conf),
-                        "bbox": box.xyxy[0].tolist()  # [x1, y1, x2, y2]
-                    }
-                    detections.append(detection)
-            
-            return detections
+            results = self.model(self._as_source(image_path), conf=self.conf_threshold,
+                                 classes=self._class_ids(wanted), verbose=False)
+            batch = DetectionBatch.from_result(results[0]) if results else DetectionBatch.empty()
         except Exception as e:
             logger.error(f"Detection failed: {e}")
-            return []
+            return DetectionBatch.empty()
+        
+        if key is not None:
+            self.cache.put(key, wanted, batch)
+        return batch
+    
+    def detect_batch(self, images: Sequence[ImageInput],
+                     batch_size: int = 16,
+                     classes: Optional[Sequence[str]] = None) -> List[DetectionBatch]:
+        """
+        Detect objects in several images with batched forward passes
+        
+        Args:
+            images: Image paths, decoded BGR arrays and/or Frames
+            batch_size: Maximum number of images per forward pass
+            classes: Restrict inference to these class names (default: detector's classes)
+        
+        Returns:
+            One DetectionBatch per input image, in input order
+        """
+        if not self.model:
+            return [DetectionBatch.empty() for _ in images]
+        
+        wanted = self._resolve_classes(classes)
+        class_ids = self._class_ids(wanted)
+        batch_size = max(1, batch_size)
+        all_detections: List[Optional[DetectionBatch]] = [None] * len(images)
+        
+        # Serve what we can from the cache; only infer the rest
+        keys = [self._cache_key(img) for img in images]
+        pending = []
+        for i, key in enumerate(keys):
+            if key is not None:
+                all_detections[i] = self.cache.get(key, wanted)
+            if all_detections[i] is None:
+                pending.append(i)
+        
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            sources = [self._as_source(images[i]) for i in chunk]
+            try:
+                results = self.model(sources, conf=self.conf_threshold, classes=class_ids,
+                                     batch=len(sources), verbose=False)
+                for i, result in zip(chunk, results):
+                    all_detections[i] = DetectionBatch.from_result(result)
+                    if keys[i] is not None:
+                        self.cache.put(keys[i], wanted, all_detections[i])
+            except Exception as e:
+                logger.error(f"Batch detection failed: {e}")
+        
+        return [d if d is not None else DetectionBatch.empty() for d in all_detections]
+    
+    def detect_for_camera(self, image: ImageInput, camera: str,
+                          classes: Optional[Sequence[str]] = None) -> DetectionBatch:
+        """
+        Detect using the camera's configured mode (CAMERAS[camera]['detection_mode']):
+        "full" (default), "zones" (crops over active zone polygons) or "tiled".
+        """
+        camera_config = CAMERAS.get(camera, {})
+        mode = camera_config.get("detection_mode", "full")
+        
+        if mode == "zones":
+            decoded = self._decode(image)
+            if decoded is None:
+                return DetectionBatch.empty()
+            height, width = decoded.shape[:2]
+            polygons = active_polygons(camera_config, width, height)
+            return self.detect_zones(decoded, polygons, classes=classes)
+        if mode == "tiled":
+            return self.detect_tiled(image, classes=classes)
+        return self.detect(image, classes=classes)
+    
+    def detect_zones(self, image: ImageInput, polygons: List[np.ndarray],
+                     imgsz: Optional[int] = None,
+                     classes: Optional[Sequence[str]] = None) -> DetectionBatch:
+        """
+        Infer only on crops covering the given zone polygons.
+        
+        Args:
+            image: Image path, decoded BGR array or Frame
+            polygons: Zone polygons in pixel coordinates
+            imgsz: Model input size for the crops (default: MODEL_CONFIG['yolo']['zone_imgsz'])
+            classes: Restrict inference to these class names
+        
+        Returns:
+            Detections in full-frame coordinates whose centre lies inside a zone
+        """
+        decoded = self._decode(image)
+        if not self.model or decoded is None:
+            return DetectionBatch.empty()
+        if not polygons:
+            return self.detect(image, classes=classes)
+        
+        height, width = decoded.shape[:2]
+        imgsz = imgsz or MODEL_CONFIG["yolo"].get("zone_imgsz", 320)
+        batch = self._detect_regions(decoded, zone_rects(polygons, width, height),
+                                     imgsz, classes)
+        return batch._subset(points_in_polygons(batch.centers(), polygons))
+    
+    def detect_tiled(self, image: ImageInput, tile_size: Optional[int] = None,
+                     overlap: float = 0.2, iou_threshold: float = 0.5,
+                     classes: Optional[Sequence[str]] = None) -> DetectionBatch:
+        """
+        Full-frame pass plus overlapping full-resolution tiles, for small
+        distant people. Tile boxes are mapped back and merged with NMS.
+        """
+        decoded = self._decode(image)
+        if not self.model or decoded is None:
+            return DetectionBatch.empty()
+        
+        height, width = decoded.shape[:2]
+        tile_size = tile_size or MODEL_CONFIG["yolo"].get("tile_size", 640)
+        tiles = self._detect_regions(decoded, tile_rects(width, height, tile_size, overlap),
+                                     tile_size, classes)
+        merged = DetectionBatch.concat([self.detect(decoded, classes=classes), tiles],
+                                       self.model.names)
+        return merged._subset(nms(merged.boxes, merged.confidences,
+                                  merged.class_ids, iou_threshold))
     
-    def detect_person(self, image_path: Path) -> bool:
+    def _detect_regions(self, image: np.ndarray, rects: List[Rect], imgsz: int,
+                        classes: Optional[Sequence[str]]) -> DetectionBatch:
+        """Batched inference over crops, boxes returned in full-frame coordinates"""
+        if not rects:
+            return DetectionBatch.empty(self.model.names)
+        crops = [image[y1:y2, x1:x2] for x1, y1, x2, y2 in rects]
+        try:
+            results = self.model(crops, conf=self.conf_threshold,
+                                 classes=self._class_ids(self._resolve_classes(classes)),
+                                 imgsz=imgsz, batch=len(crops), verbose=False)
+        except Exception as e:
+            logger.error(f"Region detection failed: {e}")
+            return DetectionBatch.empty(self.model.names)
+        return DetectionBatch.concat(
+            [DetectionBatch.from_result(r).offset(rect[0], rect[1])
+             for r, rect in zip(results, rects)],
+            self.model.names
+        )
+    
+    @staticmethod
+    def _decode(image: ImageInput) -> Optional[np.ndarray]:
+        """BGR array for a path, array or Frame"""
+        if isinstance(image, Frame):
+            return image.image
+        if isinstance(image, np.ndarray):
+            return image
+        decoded = cv2.imread(str(image), cv2.IMREAD_COLOR)
+        if decoded is None:
+            logger.error(f"Could not decode image: {image}")
+        return decoded
+    
+    @staticmethod
+    def _as_source(image: ImageInput):
+        """Model input for a path, array or already-decoded Frame"""
+        if isinstance(image, Frame):
+            return image.image
+        if isinstance(image, np.ndarray):
+            return image
+        return str(image)
+    
+    def detect_person(self, image_path: ImageInput) -> bool:
         """Quick check if person is in image"""
-        detections = self.detect(image_path)
-        return any(d["class"] == "person" for d in detections)
+        return self.get_person_count(image_path) > 0
     
-    def get_person_count(self, image_path: Path) -> int:
-        """Count number of people in image"""
-        detections = self.detect(image_path)
-        return sum(1 for d in detections if d["class"] == "person")
-
+    def get_person_count(self, image_path: ImageInput) -> int:
+        """Count number of people in image (person-only inference, cached)"""
+        return len(self.detect(image_path, classes=["person"]).persons())
 
 if __name__ == "__main__":
     # Test
@@ -75,3 +586,5 @@ if __name__ == "__main__":
         print(f"Found {len(detections)} objects:")
         for d in detections:
             print(f"  - {d['class']}: {d['confidence']:.2f}")
+        if detector.backend != "pytorch":
+            print(f"Parity vs pytorch: {detector.check_parity([test_image])}")
@@ -0,0 +1,246 @@
+"""Event Archive Module - Day-partitioned binary storage for behavioral history
+
+Layout:
+
+    behavioral_archive/
+        manifest.json            # day -> count, time range, camera/person tables
+        2026-02-13/timestamp.npy # one .npy per EventStore column
+        2026-02-13/camera.npy
+        ...
+
+Convert an existing JSONL log (all days) with:
+
+    python src/event_archive.py behavioral_events.jsonl behavioral_archive/
+"""
+import os
+import sys
+import json
+import logging
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from event_store import COLUMNS, EventStore, from_epoch
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def _atomic_write(path: Path, write):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, 'wb') as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+class EventArchive:
+    """
+    Day-partitioned columnar event history.
+
+    Each day is a directory of .npy columns sorted by timestamp, with its
+    own camera/person code tables in the manifest. Opening the archive only
+    reads the manifest; columns are memory-mapped on demand for the days a
+    query touches.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.manifest_file = self.root / "manifest.json"
+        self._lock = threading.Lock()
+        self.days: Dict[str, Dict] = {}
+        if self.manifest_file.exists():
+            with open(self.manifest_file, 'r') as f:
+                self.days = json.load(f).get("days", {})
+
+    def _save_manifest(self):
+        data = {"version": MANIFEST_VERSION, "days": dict(sorted(self.days.items()))}
+        _atomic_write(self.manifest_file, lambda f: f.write(json.dumps(data, indent=2).encode()))
+
+    @property
+    def count(self) -> int:
+        return sum(entry["count"] for entry in self.days.values())
+
+    def time_range(self) -> Optional[Tuple[datetime, datetime]]:
+        if not self.days:
+            return None
+        return (from_epoch(min(e["start"] for e in self.days.values())),
+                from_epoch(max(e["end"] for e in self.days.values())))
+
+    def _read_day(self, day: str, names: Sequence[str], mmap: bool = True) -> Dict[str, np.ndarray]:
+        mode = "r" if mmap else None
+        return {name: np.load(self.root / day / f"{name}.npy", mmap_mode=mode) for name in names}
+
+    def write_day(self, day: str, columns: Dict[str, np.ndarray],
+                  cameras: List[str], persons: List[str]):
+        """
+        Add events to a day partition (merged with what is already there).
+
+        columns hold camera/person codes into the given cameras/persons tables.
+        Rows identical to archived ones are skipped, so importing the same log
+        twice (e.g. after a crash before it was rewritten) is harmless. The
+        manifest entry is written last.
+        """
+        with self._lock:
+            entry = self.days.get(day)
+            if entry is not None:
+                # Re-encode both sides against the union of the code tables
+                existing = self._read_day(day, COLUMNS, mmap=False)
+                cameras_all = list(dict.fromkeys(entry["cameras"] + cameras))
+                persons_all = list(dict.fromkeys(entry["persons"] + persons))
+                camera_index = {c: i for i, c in enumerate(cameras_all)}
+                person_index = {p: i for i, p in enumerate(persons_all)}
+
+                def recode(cols, cams, pers):
+                    cols = dict(cols)
+                    cols["camera"] = np.array([camera_index[c] for c in cams],
+                                              dtype=np.int16)[cols["camera"]]
+                    cols["person"] = np.array([person_index[p] for p in pers] + [-1],
+                                              dtype=np.int32)[cols["person"]]
+                    return cols
+
+                old = recode(existing, entry["cameras"], entry["persons"])
+                new = recode(columns, cameras, persons)
+                columns = {name: np.concatenate([old[name], new[name]]) for name in COLUMNS}
+                cameras, persons = cameras_all, persons_all
+
+                rows = np.rec.fromarrays([np.asarray(columns[name], dtype=dtype)
+                                          for name, dtype in COLUMNS.items()], names=list(COLUMNS))
+                _, first = np.unique(rows, return_index=True)
+                if len(first) < len(rows):
+                    keep = np.sort(first)
+                    columns = {name: values[keep] for name, values in columns.items()}
+                    logger.info(f"Skipped {len(rows) - len(first)} already archived events for {day}")
+
+            order = np.argsort(columns["timestamp"], kind="stable")
+            day_dir = self.root / day
+            day_dir.mkdir(exist_ok=True)
+            for name, dtype in COLUMNS.items():
+                values = np.ascontiguousarray(np.asarray(columns[name], dtype=dtype)[order])
+                _atomic_write(day_dir / f"{name}.npy", lambda f: np.save(f, values))
+
+            timestamps = columns["timestamp"]
+            self.days[day] = {
+                "count": int(len(timestamps)),
+                "start": float(timestamps.min()),
+                "end": float(timestamps.max()),
+                "cameras": cameras,
+                "persons": persons
+            }
+            self._save_manifest()
+
+    def columns(self, store: EventStore, names: Optional[Sequence[str]] = None,
+                start: Optional[float] = None, end: Optional[float] = None,
+                camera: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Columns of archived events with start <= timestamp < end (epoch seconds),
+        optionally of one camera, with camera/person codes translated into
+        `store`'s code tables. Only the partitions overlapping the range are
+        read, and only the selected rows are copied out of them.
+        """
+        names = list(names or COLUMNS)
+        read = list(dict.fromkeys(names + ["timestamp"] + (["camera"] if camera else [])))
+        parts = {name: [] for name in names}
+        with self._lock:  # Partitions are not rewritten mid-read
+            for day, entry in sorted(self.days.items()):
+                if ((start is not None and entry["end"] < start) or
+                        (end is not None and entry["start"] >= end)):
+                    continue
+                cols = self._read_day(day, read)
+                ts = cols["timestamp"]
+                lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+                hi = len(ts) if end is None else int(np.searchsorted(ts, end, side="left"))
+                if lo >= hi:
+                    continue
+                rows = slice(lo, hi)
+                if camera is not None:
+                    if camera not in entry["cameras"]:
+                        continue
+                    code = entry["cameras"].index(camera)
+                    rows = lo + np.flatnonzero(cols["camera"][lo:hi] == code)
+                    if not len(rows):
+                        continue
+                for name in names:
+                    values = cols[name][rows]
+                    if name == "camera":
+                        remap = np.array([store.camera_code(c) for c in entry["cameras"]],
+                                         dtype=np.int16)
+                        values = remap[values]
+                    elif name == "person":
+                        remap = np.array([store.person_code(p) for p in entry["persons"]] + [-1],
+                                         dtype=np.int32)
+                        values = remap[values]
+                    parts[name].append(np.asarray(values))
+        return {
+            name: np.concatenate(chunks) if chunks else np.empty(0, dtype=COLUMNS[name])
+            for name, chunks in parts.items()
+        }
+
+    def import_jsonl(self, path: Path, before: Optional[date] = None,
+                     max_buffered: int = 500_000) -> int:
+        """
+        Move events dated before `before` (all events if None) from a JSONL
+        log into the archive; the log is rewritten with the remaining lines.
+
+        Returns:
+            Number of events archived
+        """
+        path = Path(path)
+        store = EventStore()
+        kept: List[str] = []
+        archived = 0
+
+        def flush_pending():
+            nonlocal store
+            if not store:
+                return
+            cols = store.columns()
+            days = (cols["timestamp"] // 86400).astype(np.int64)
+            for day in np.unique(days):
+                rows = days == day
+                self.write_day(from_epoch(day * 86400).date().isoformat(),
+                               {name: values[rows] for name, values in cols.items()},
+                               store.cameras, store.persons)
+            store = EventStore()
+
+        with open(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                    timestamp = datetime.fromisoformat(data["timestamp"])
+                    x, y = data["position"]
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.warning(f"Skipping malformed event line in {path.name}: {e}")
+                    continue
+                if before is not None and timestamp.date() >= before:
+                    kept.append(line if line.endswith("\n") else line + "\n")
+                    continue
+                store.append(timestamp, data["camera"], data.get("person_id"),
+                             x, y, data["confidence"])
+                archived += 1
+                if len(store) >= max_buffered:
+                    flush_pending()
+        flush_pending()
+
+        if archived:
+            _atomic_write(path, lambda f: f.write("".join(kept).encode()))
+            logger.info(f"Archived {archived} events from {path.name} ({len(kept)} kept)")
+        return archived
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if len(sys.argv) != 3:
+        print(f"Usage: {sys.argv[0]} EVENTS_JSONL ARCHIVE_DIR")
+        sys.exit(1)
+    archive = EventArchive(Path(sys.argv[2]))
+    count = archive.import_jsonl(Path(sys.argv[1]))
+    print(f"Archived {count} events into {len(archive.days)} day partitions")
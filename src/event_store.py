@@ -0,0 +1,278 @@
+"""Event Store Module - Compact columnar in-memory storage for movement events"""
+import bisect
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+COLUMNS = {
+    "timestamp": np.float64,  # Wall-clock seconds since EPOCH (naive, as recorded)
+    "camera": np.int16,       # Code into EventStore.cameras
+    "person": np.int32,       # Code into EventStore.persons, -1 = unidentified
+    "x": np.float32,          # Bbox center in pixels
+    "y": np.float32,
+    "confidence": np.float32
+}
+
+
+def to_epoch(timestamp: datetime) -> float:
+    """Naive wall-clock datetime -> seconds since EPOCH (no timezone conversion)"""
+    return (timestamp.replace(tzinfo=None) - EPOCH).total_seconds()
+
+
+def from_epoch(seconds: float) -> datetime:
+    return EPOCH + timedelta(seconds=float(seconds))
+
+
+def hours_of_day(seconds: np.ndarray) -> np.ndarray:
+    return (seconds // 3600 % 24).astype(np.int64)
+
+
+def days_of_week(seconds: np.ndarray) -> np.ndarray:
+    """Monday = 0, like datetime.weekday() (EPOCH was a Thursday)"""
+    return ((seconds // 86400 + 3) % 7).astype(np.int64)
+
+
+class EventStore:
+    """
+    Append-only columnar store of movement events.
+
+    Events live in fixed-size NumPy chunks (26 bytes per event) with
+    camera and person ids dictionary-encoded, instead of one dataclass
+    with datetime and tuple objects per event.
+
+    The chunks are kept in timestamp order, so time ranges are found by
+    bisecting chunk start times and then each boundary chunk. Events older
+    than the newest one (late arrivals) go to a small side buffer that is
+    scanned linearly and merged into the chunks once it grows past
+    max_late.
+
+    Past days are removed with drop_before() once they are archived; a
+    lock keeps that safe against appends and queries on other threads.
+    """
+
+    def __init__(self, chunk_size: int = 65536, max_late: int = 4096):
+        self.chunk_size = chunk_size
+        self.max_late = max_late
+        self.cameras: List[str] = []
+        self.persons: List[str] = []
+        self._camera_codes: Dict[str, int] = {}
+        self._person_codes: Dict[str, int] = {}
+
+        self._sealed: List[Dict[str, np.ndarray]] = []
+        self._chunk_starts: List[float] = []  # First timestamp of each sealed chunk
+        self._active = self._new_chunk()
+        self._fill = 0
+        self._late: Dict[str, list] = {name: [] for name in COLUMNS}
+        self._time_range: Optional[Tuple[float, float]] = None
+        self._lock = threading.RLock()
+
+    def _new_chunk(self) -> Dict[str, np.ndarray]:
+        return {name: np.empty(self.chunk_size, dtype=dtype) for name, dtype in COLUMNS.items()}
+
+    def camera_code(self, camera: str, add: bool = True) -> Optional[int]:
+        """Code of a camera; unknown names get a new code, or None with add=False"""
+        code = self._camera_codes.get(camera)
+        if code is None and add:
+            code = self._camera_codes[camera] = len(self.cameras)
+            self.cameras.append(camera)
+        return code
+
+    def person_code(self, person_id: Optional[str], add: bool = True) -> Optional[int]:
+        """Code of a person (-1 = unidentified); like camera_code()"""
+        if person_id is None:
+            return -1
+        code = self._person_codes.get(person_id)
+        if code is None and add:
+            code = self._person_codes[person_id] = len(self.persons)
+            self.persons.append(person_id)
+        return code
+
+    def append(self, timestamp: datetime, camera: str, person_id: Optional[str],
+               x: float, y: float, confidence: float):
+        """Add one event"""
+        with self._lock:
+            self._append(to_epoch(timestamp), camera, person_id, x, y, confidence)
+
+    def _append(self, seconds: float, camera: str, person_id: Optional[str],
+                x: float, y: float, confidence: float):
+        values = (seconds, self.camera_code(camera), self.person_code(person_id),
+                  x, y, confidence)
+        in_order = self._time_range is None or seconds >= self._time_range[1]
+
+        if self._time_range is None:
+            self._time_range = (seconds, seconds)
+        else:
+            self._time_range = (min(self._time_range[0], seconds),
+                                max(self._time_range[1], seconds))
+
+        if not in_order:
+            for name, value in zip(COLUMNS, values):
+                self._late[name].append(value)
+            if len(self._late["timestamp"]) > self.max_late:
+                self._merge_late()
+            return
+
+        row = self._active
+        i = self._fill
+        for name, value in zip(COLUMNS, values):
+            row[name][i] = value
+        self._fill += 1
+        if self._fill == self.chunk_size:
+            self._seal()
+
+    def _seal(self):
+        self._sealed.append(self._active)
+        self._chunk_starts.append(float(self._active["timestamp"][0]))
+        self._active = self._new_chunk()
+        self._fill = 0
+
+    def _reload(self, columns: Dict[str, np.ndarray]):
+        """Replace the contents with `columns`, sorted into fresh chunks"""
+        order = np.argsort(columns["timestamp"], kind="stable")
+        self._sealed, self._chunk_starts = [], []
+        self._active, self._fill = self._new_chunk(), 0
+        self._late = {name: [] for name in COLUMNS}
+        for start in range(0, len(order), self.chunk_size):
+            rows = order[start:start + self.chunk_size]
+            for name in COLUMNS:
+                self._active[name][:len(rows)] = columns[name][rows]
+            self._fill = len(rows)
+            if self._fill == self.chunk_size:
+                self._seal()
+        timestamps = columns["timestamp"]
+        self._time_range = ((float(timestamps.min()), float(timestamps.max()))
+                            if len(timestamps) else None)
+
+    def _merge_late(self):
+        """Re-sort late arrivals into the chunks (rare; O(n log n))"""
+        self._reload(self.columns())
+        logger.debug(f"Merged late events; {len(self)} events re-sorted")
+
+    def drop_before(self, seconds: float) -> int:
+        """
+        Remove events with timestamp < seconds (e.g. once they are archived).
+        Code tables are kept so existing codes stay valid.
+
+        Returns:
+            Number of events removed
+        """
+        with self._lock:
+            kept = self.range(start=seconds)
+            dropped = len(self) - len(kept["timestamp"])
+            if dropped:
+                self._reload(kept)
+            return dropped
+
+    def __len__(self) -> int:
+        return len(self._sealed) * self.chunk_size + self._fill + len(self._late["timestamp"])
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def columns(self, names: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Contiguous arrays of the requested columns (all by default), late arrivals last"""
+        with self._lock:
+            return {
+                name: np.concatenate([chunk[name] for chunk in self._sealed] +
+                                     [self._active[name][:self._fill],
+                                      np.asarray(self._late[name], dtype=COLUMNS[name])])
+                for name in (names or COLUMNS)
+            }
+
+    def _range_slices(self, start: Optional[float], end: Optional[float]):
+        """(chunk, lo, hi) row ranges of sorted chunks with start <= timestamp < end"""
+        chunks = self._sealed + [self._active]
+        starts = self._chunk_starts + ([float(self._active["timestamp"][0])] if self._fill else [])
+        # bisect_left: the previous chunk can end with timestamps equal to start
+        first = 0 if start is None else max(bisect.bisect_left(starts, start) - 1, 0)
+        last = len(starts) if end is None else bisect.bisect_left(starts, end)
+        for i in range(first, last):
+            chunk = chunks[i]
+            size = self.chunk_size if i < len(self._sealed) else self._fill
+            ts = chunk["timestamp"][:size]
+            lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+            hi = size if end is None else int(np.searchsorted(ts, end, side="left"))
+            if lo < hi:
+                yield chunk, lo, hi
+
+    def _late_mask(self, start: Optional[float], end: Optional[float]) -> np.ndarray:
+        late = np.asarray(self._late["timestamp"], dtype=np.float64)
+        mask = np.ones(len(late), dtype=bool)
+        if start is not None:
+            mask &= late >= start
+        if end is not None:
+            mask &= late < end
+        return mask
+
+    def range(self, start: Optional[float] = None, end: Optional[float] = None,
+              names: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Columns of events with start <= timestamp < end (epoch seconds).
+        Cost is proportional to the events in range (plus the late buffer),
+        not to the store size.
+        """
+        names = list(names or COLUMNS)
+        with self._lock:
+            slices = list(self._range_slices(start, end))
+            late = self._late_mask(start, end)
+            return {
+                name: np.concatenate([chunk[name][lo:hi] for chunk, lo, hi in slices] +
+                                     [np.asarray(self._late[name], dtype=COLUMNS[name])[late]])
+                for name in names
+            }
+
+    def count(self, start: Optional[float] = None, end: Optional[float] = None) -> int:
+        """Number of events with start <= timestamp < end, without copying columns"""
+        with self._lock:
+            return (sum(hi - lo for _, lo, hi in self._range_slices(start, end)) +
+                    int(self._late_mask(start, end).sum()))
+
+    def camera_names(self, codes: np.ndarray) -> np.ndarray:
+        return np.array(self.cameras, dtype=object)[codes]
+
+    def person_names(self, codes: np.ndarray, missing: Optional[str] = None) -> np.ndarray:
+        """Decode person codes; -1 indexes the trailing `missing` entry"""
+        return np.array(self.persons + [missing], dtype=object)[codes]
+
+    def time_range(self) -> Optional[Tuple[datetime, datetime]]:
+        """(earliest, latest) event timestamps, tracked on append"""
+        if self._time_range is None:
+            return None
+        return from_epoch(self._time_range[0]), from_epoch(self._time_range[1])
+
+    def __iter__(self) -> Iterator[tuple]:
+        """Rows as (timestamp, camera, person_id, (x, y), confidence)"""
+        columns = self.columns()
+        for i in range(len(columns["timestamp"])):
+            person = int(columns["person"][i])
+            yield (
+                from_epoch(columns["timestamp"][i]),
+                self.cameras[columns["camera"][i]],
+                self.persons[person] if person >= 0 else None,
+                (float(columns["x"][i]), float(columns["y"][i])),
+                float(columns["confidence"][i])
+            )
+
+    @property
+    def nbytes(self) -> int:
+        chunks = len(self._sealed) + 1
+        return chunks * sum(np.dtype(dtype).itemsize for dtype in COLUMNS.values()) * self.chunk_size
+
+
+if __name__ == "__main__":
+    # Equal timestamps across a chunk boundary
+    store = EventStore(chunk_size=4)
+    t = datetime(2026, 2, 13, 19, 0)
+    for offset in (0, 1, 2, 3, 3, 3, 4):
+        store.append(t + timedelta(seconds=offset), "sala", None, 0.0, 0.0, 1.0)
+    start = to_epoch(t) + 3
+    assert store.count(start=start) == 4, store.count(start=start)
+    assert len(store.range(start=start)["timestamp"]) == 4
+    assert store.count(start=start, end=start + 1) == 3
+    print("EventStore range checks passed")
@@ -0,0 +1,199 @@
+"""Event Writer Module - Buffered background appends to JSONL files"""
+import os
+import atexit
+import signal
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import BEHAVIORAL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ("never", "flush", "interval")
+
+
+def exit_on_sigterm():
+    """
+    Turn SIGTERM into SystemExit, so finally blocks and atexit handlers
+    (which flush BufferedAppendWriters) run on a plain `kill`.
+    Only possible from the main thread; elsewhere this is a no-op.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    def handle(signum, frame):
+        raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, handle)
+
+
+class BufferedAppendWriter:
+    """
+    Append lines to a file from a background thread.
+
+    write() only buffers in memory; the worker keeps the file open and
+    flushes when max_buffer lines are waiting or flush_interval seconds
+    have passed. fsync policy: "never" (leave it to the OS), "flush"
+    (after every flush) or "interval" (at most every fsync_interval s).
+    """
+
+    def __init__(self, path: Path,
+                 max_buffer: Optional[int] = None,
+                 flush_interval: Optional[float] = None,
+                 fsync: Optional[str] = None,
+                 fsync_interval: Optional[float] = None):
+        writer_config = BEHAVIORAL_CONFIG.get("writer", {})
+        self.path = Path(path)
+        self.max_buffer = max_buffer or writer_config.get("max_buffer", 256)
+        self.flush_interval = flush_interval or writer_config.get("flush_interval", 2.0)
+        self.fsync = fsync or writer_config.get("fsync", "interval")
+        self.fsync_interval = fsync_interval or writer_config.get("fsync_interval", 30.0)
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{self.fsync}' (expected one of {FSYNC_POLICIES})")
+
+        self._buffer: List[str] = []
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()  # Held while the file is being written
+        self._running = True
+        self._flush_requested = False
+        self._queued = 0   # Lines ever buffered
+        self._written = 0  # Lines ever written
+        self._file = None
+        self._last_error: Optional[OSError] = None
+        self._last_fsync = time.monotonic()
+        self.stats = {"lines_written": 0, "flushes": 0, "fsyncs": 0, "errors": 0}
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=f"writer-{self.path.name}",
+                                        daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, line: str):
+        """Buffer one line (newline added); never touches the disk"""
+        with self._cond:
+            if not self._running:
+                raise RuntimeError(f"Writer for {self.path} is closed")
+            self._buffer.append(line)
+            self._queued += 1
+            if len(self._buffer) >= self.max_buffer:
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write everything buffered so far; blocks until it is on disk (or timeout).
+
+        Raises:
+            OSError: if a write fails meanwhile (the lines stay buffered for a retry)
+        """
+        with self._cond:
+            target = self._queued
+            errors = self.stats["errors"]
+            self._flush_requested = True
+            self._cond.notify_all()
+            done = self._cond.wait_for(
+                lambda: (self._written >= target or self.stats["errors"] > errors
+                         or not self._thread.is_alive()), timeout)
+            if self._written < target and self.stats["errors"] > errors:
+                raise OSError(f"Failed to flush {self.path}: {self._last_error}")
+            return done
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: (not self._running or self._flush_requested
+                             or len(self._buffer) >= self.max_buffer),
+                    self.flush_interval)
+                lines, self._buffer = self._buffer, []
+                self._flush_requested = False
+                running = self._running
+
+            if lines:
+                self._write(lines)
+            with self._cond:
+                self._cond.notify_all()
+            if not running and not self._buffer:
+                break
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, lines: List[str]):
+        start = time.monotonic()
+        try:
+            with self._io_lock:
+                if self._file is None:
+                    self._file = open(self.path, 'a')
+                self._file.write("\n".join(lines) + "\n")
+                self._file.flush()
+                if self.fsync == "flush" or (
+                        self.fsync == "interval" and start - self._last_fsync >= self.fsync_interval):
+                    os.fsync(self._file.fileno())
+                    self._last_fsync = start
+                    self.stats["fsyncs"] += 1
+        except OSError as e:
+            logger.error(f"Failed to write {len(lines)} lines to {self.path}: {e}")
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            with self._cond:
+                self._last_error = e
+                self.stats["errors"] += 1
+                # Keep the lines for the next attempt unless the backlog is runaway
+                if self._running and len(self._buffer) < 10 * self.max_buffer:
+                    self._buffer[:0] = lines
+                    return
+        else:
+            self.stats["lines_written"] += len(lines)
+            self.stats["flushes"] += 1
+            elapsed = time.monotonic() - start
+            self._latency_total += elapsed
+            self._latency_max = max(self._latency_max, elapsed)
+        with self._cond:
+            self._written += len(lines)
+
+    @contextmanager
+    def paused(self):
+        """
+        Flush, then keep the worker off the file for the duration (e.g. while
+        it is rewritten). write() keeps buffering in the meantime.
+
+        Raises:
+            OSError: if buffered lines cannot be written first
+        """
+        self.flush()
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            yield
+
+    def get_stats(self) -> Dict:
+        flushes = self.stats["flushes"]
+        with self._cond:
+            buffered = len(self._buffer)
+        return {
+            **self.stats,
+            "buffered": buffered,
+            "avg_flush_ms": round(self._latency_total / flushes * 1000, 2) if flushes else 0.0,
+            "max_flush_ms": round(self._latency_max * 1000, 2)
+        }
+
+    def close(self):
+        """Flush what is buffered (with a final fsync unless policy is "never") and stop"""
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            if self.fsync == "interval":
+                self.fsync = "flush"  # Make the last flush durable
+            self._cond.notify_all()
+        self._thread.join()
+        atexit.unregister(self.close)
@@ -0,0 +1,62 @@
+"""Frame Module - Decoded image shared across pipeline stages"""
+import logging
+from pathlib import Path
+from typing import Optional
+from datetime import datetime
+from dataclasses import dataclass, field
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Frame:
+    """A camera snapshot decoded once and handed to every stage"""
+    image: np.ndarray  # BGR, HxWx3 (OpenCV/ultralytics layout)
+    camera: str
+    timestamp: datetime
+    path: Optional[Path] = None
+    _pil: Optional[object] = field(default=None, init=False, repr=False)
+
+    @classmethod
+    def from_path(cls, image_path: Path, camera: str,
+                  timestamp: Optional[datetime] = None) -> "Frame":
+        """Decode an image file into a Frame"""
+        image = cv2.imread(str(image_path), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"Could not decode image: {image_path}")
+        return cls(
+            image=image,
+            camera=camera,
+            timestamp=timestamp or datetime.now(),
+            path=Path(image_path)
+        )
+
+    @property
+    def height(self) -> int:
+        return self.image.shape[0]
+
+    @property
+    def width(self) -> int:
+        return self.image.shape[1]
+
+    def to_rgb(self) -> np.ndarray:
+        """RGB view of the frame (for PIL/transformers consumers)"""
+        return cv2.cvtColor(self.image, cv2.COLOR_BGR2RGB)
+
+    def to_pil(self):
+        """PIL image of the frame, converted once and reused"""
+        if self._pil is None:
+            from PIL import Image
+            self._pil = Image.fromarray(self.to_rgb())
+        return self._pil
+
+    def downscaled(self, max_side: int) -> "Frame":
+        """Copy of the frame with its long side capped at max_side pixels"""
+        scale = max_side / max(self.height, self.width)
+        if scale >= 1:
+            return self
+        size = (int(round(self.width * scale)), int(round(self.height * scale)))
+        image = cv2.resize(self.image, size, interpolation=cv2.INTER_AREA)
+        return Frame(image=image, camera=self.camera, timestamp=self.timestamp, path=self.path)
@@ -0,0 +1,266 @@
+"""Index Queue Module - Background semantic indexing off the frame path"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional
+
+from config import CHROMA_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IndexJob:
+    """One event waiting to be embedded and written"""
+    event: Dict  # index_event() keyword arguments
+    callback: Optional[Callable[[str], None]] = None
+    enqueued: float = field(default_factory=time.monotonic)
+    attempts: int = 0  # Failed index_events() calls so far
+    retry_at: float = 0.0  # Monotonic time before which it is not retried
+
+
+class IndexQueue:
+    """
+    Bounded FIFO feeding a background indexing thread.
+
+    The worker writes a batch through search.index_events() once batch_size
+    events are waiting or the oldest has waited max_wait_seconds. submit()
+    never blocks: when the queue is full the oldest event is moved to the
+    spill file. A failed batch is retried up to max_retries times with
+    doubling delays, then spilled too. Spilled events are queued again
+    when the next IndexQueue starts. close() drains what is queued before
+    stopping.
+    """
+
+    def __init__(self, search,
+                 max_size: Optional[int] = None,
+                 batch_size: Optional[int] = None,
+                 max_wait_seconds: Optional[float] = None,
+                 max_retries: Optional[int] = None,
+                 spill_file: Optional[Path] = None):
+        """
+        Args:
+            search: SemanticSearch (or SimpleTextSearch) with index_events()
+            max_size: Maximum queued events
+            batch_size: Events per index_events() call
+            max_wait_seconds: Longest an event waits for its batch to fill
+            max_retries: Retries of a failed batch before its events are spilled
+            spill_file: JSONL file for events that could not be indexed
+        """
+        queue_config = CHROMA_CONFIG.get("index_queue", {})
+        self.search = search
+        self.max_size = max_size or queue_config.get("max_size", 1024)
+        self.batch_size = batch_size or queue_config.get("batch_size", 32)
+        self.max_wait = max_wait_seconds or queue_config.get("max_wait_seconds", 2.0)
+        self.max_retries = (max_retries if max_retries is not None
+                            else queue_config.get("max_retries", 3))
+        self.retry_backoff = queue_config.get("retry_backoff_seconds", 1.0)
+        spill_file = spill_file or queue_config.get("spill_file")
+        self.spill_file = Path(spill_file) if spill_file else None
+        self._spill_lock = threading.Lock()
+
+        self._queue: Deque[IndexJob] = deque()
+        self._cond = threading.Condition()
+        self._running = True
+        self._flush_requested = False
+        self._unfinished = 0  # Queued + in-flight jobs
+        self.stats = {"submitted": 0, "indexed": 0, "batches": 0, "dropped": 0,
+                      "errors": 0, "retries": 0, "spilled": 0, "replayed": 0}
+        self._lag_total = 0.0
+        self._lag_count = 0
+        self._last_lag = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="index-queue", daemon=True)
+        self._thread.start()
+        self._replay_spilled()
+
+    def _spill(self, jobs: List[IndexJob]):
+        """Append events that could not be indexed to the spill file"""
+        if not jobs:
+            return
+        if self.spill_file is None:
+            logger.error(f"Lost {len(jobs)} events: indexing failed and no spill file is set")
+            return
+        lines = []
+        for job in jobs:
+            event = dict(job.event)
+            if isinstance(event.get("timestamp"), datetime):
+                event["timestamp"] = event["timestamp"].isoformat()
+            lines.append(json.dumps(event, default=lambda o: o.item() if hasattr(o, "item") else str(o)))
+        try:
+            with self._spill_lock, open(self.spill_file, 'a') as f:
+                f.write("\n".join(lines) + "\n")
+            self.stats["spilled"] += len(jobs)
+            logger.warning(f"Spilled {len(jobs)} events to {self.spill_file} for a later retry")
+        except OSError as e:
+            logger.error(f"Lost {len(jobs)} events: could not write {self.spill_file}: {e}")
+
+    def _replay_spilled(self):
+        """Queue the events spilled by an earlier run"""
+        if self.spill_file is None or not self.spill_file.exists():
+            return
+        with self._spill_lock:
+            try:
+                with open(self.spill_file, 'r') as f:
+                    events = [json.loads(line) for line in f if line.strip()]
+                self.spill_file.unlink()
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to read spilled events from {self.spill_file}: {e}")
+                return
+        for event in events:
+            event["timestamp"] = datetime.fromisoformat(event["timestamp"])
+            if event.get("image_path") is not None:
+                event["image_path"] = Path(event["image_path"])
+            self.submit(event)
+        self.stats["replayed"] += len(events)
+        if events:
+            logger.info(f"Re-queued {len(events)} spilled events")
+
+    def submit(self, event: Dict, callback: Optional[Callable[[str], None]] = None) -> bool:
+        """
+        Queue an event for indexing; callback receives its event id.
+
+        Returns:
+            False if the queue is closed
+        """
+        with self._cond:
+            if not self._running:
+                return False
+            self.stats["submitted"] += 1
+            dropped = None
+            if len(self._queue) >= self.max_size:
+                dropped = self._queue.popleft()
+                self.stats["dropped"] += 1
+                self._unfinished -= 1
+            self._queue.append(IndexJob(event, callback))
+            self._unfinished += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        if dropped is not None:
+            logger.warning(f"Index queue full ({self.max_size}); "
+                           f"spilling oldest event from {dropped.event.get('camera')}")
+            self._spill([dropped])
+        return True
+
+    def _ready(self) -> bool:
+        """A batch should be written now (caller holds the lock)"""
+        if not self._queue or self._queue[0].retry_at > time.monotonic():
+            return False
+        return (not self._running or self._flush_requested
+                or len(self._queue) >= self.batch_size
+                or time.monotonic() - self._queue[0].enqueued >= self.max_wait)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._ready():
+                    if not self._running and not self._queue:
+                        return
+                    timeout = None
+                    if self._queue:
+                        head = self._queue[0]
+                        timeout = max(0.0, self.max_wait - (time.monotonic() - head.enqueued),
+                                      head.retry_at - time.monotonic())
+                    self._cond.wait(timeout)
+                batch = []
+                while (self._queue and len(batch) < self.batch_size
+                       and self._queue[0].retry_at <= time.monotonic()):
+                    batch.append(self._queue.popleft())
+                if not self._queue:
+                    self._flush_requested = False
+
+            retry = []
+            try:
+                retry = self._index(batch)
+            finally:
+                self._retry(retry)
+                with self._cond:
+                    self._unfinished -= len(batch) - len(retry)
+                    self._cond.notify_all()
+
+    def _retry(self, jobs: List[IndexJob]):
+        """Put failed jobs back at the front after a backoff, or spill them"""
+        spill = []
+        with self._cond:
+            for job in reversed(jobs):
+                job.attempts += 1
+                if job.attempts > self.max_retries:
+                    spill.append(job)
+                    self._unfinished -= 1
+                    continue
+                job.retry_at = time.monotonic() + self.retry_backoff * 2 ** (job.attempts - 1)
+                self._queue.appendleft(job)
+                self.stats["retries"] += 1
+        self._spill(spill[::-1])
+
+    def _index(self, batch: List[IndexJob]) -> List[IndexJob]:
+        """Write a batch and hand event ids to the callbacks; returns jobs to retry"""
+        try:
+            event_ids = self.search.index_events([job.event for job in batch])
+        except Exception as e:
+            logger.error(f"Background indexing failed: {e}")
+            self.stats["errors"] += len(batch)
+            return batch
+
+        done = time.monotonic()
+        self.stats["batches"] += 1
+        failed = []
+        for job, event_id in zip(batch, event_ids):
+            if not event_id:
+                self.stats["errors"] += 1
+                failed.append(job)
+                continue
+            self._last_lag = done - job.enqueued
+            self._lag_total += self._last_lag
+            self._lag_count += 1
+            self.stats["indexed"] += 1
+            if job.callback is not None:
+                try:
+                    job.callback(event_id)
+                except Exception as e:
+                    logger.error(f"Index callback failed: {e}")
+        return failed
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Index everything queued now, without waiting for batches to fill"""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def lag_seconds(self) -> float:
+        """Age of the oldest event still waiting"""
+        with self._cond:
+            return time.monotonic() - self._queue[0].enqueued if self._queue else 0.0
+
+    def get_stats(self) -> Dict:
+        finished = self._lag_count
+        return {
+            **self.stats,
+            "depth": self.depth(),
+            "lag_seconds": round(self.lag_seconds(), 3),
+            "last_lag_seconds": round(self._last_lag, 3),
+            "avg_lag_seconds": round(self._lag_total / finished, 3) if finished else 0.0
+        }
+
+    def close(self, drain: bool = True):
+        """Stop the worker; with drain=True, index what is still queued first (else spill it)"""
+        with self._cond:
+            abandoned = []
+            if not drain:
+                abandoned = list(self._queue)
+                self._unfinished -= len(self._queue)
+                self._queue.clear()
+            self._running = False
+            self._cond.notify_all()
+        self._spill(abandoned)
+        self._thread.join()
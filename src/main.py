@@ -1,5 +1,6 @@
 """VigilHome Main Orchestrator - Integrates all components"""
 import sys
+import atexit
 import logging
 from pathlib import Path
 from datetime import datetime
@@ -9,10 +10,16 @@ import json
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config import DATA_DIR, MODELS_DIR, CAMERAS, FEATURES, TELEGRAM_CONFIG
-from detector import ObjectDetector
+from config import (DATA_DIR, MODELS_DIR, CAMERAS, FEATURES, TELEGRAM_CONFIG, MODEL_CONFIG,
+                    CHROMA_CONFIG)
+from detector import ObjectDetector, DetectionBatch
+from frame import Frame
 from scene_understanding import SceneUnderstanding
+from model_server import create_detector, create_scene_understanding
+from caption_queue import CaptionQueue
+from index_queue import IndexQueue
 from behavioral_analyzer import BehavioralAnalyzer
+from event_writer import exit_on_sigterm
 from semantic_search import SemanticSearch, create_search_engine
 
 # Setup logging
@@ -53,9 +60,16 @@ class VigilHome:
         self.scene_understanding: Optional[SceneUnderstanding] = None
         self.behavioral_analyzer: Optional[BehavioralAnalyzer] = None
         self.semantic_search: Optional[SemanticSearch] = None
+        self.caption_queue: Optional[CaptionQueue] = None
+        self.index_queue: Optional[IndexQueue] = None
+        self._shut_down = False
         
         self._init_components()
         
+        # A plain `kill` must still drain queues and checkpoint the analyzer
+        exit_on_sigterm()
+        atexit.register(self.shutdown)
+        
         logger.info("VigilHome initialized successfully")
     
     def _init_components(self):
@@ -65,7 +79,11 @@ class VigilHome:
             model_path = self.models_dir / "yolo11n.pt"
             if not model_path.exists():
                 model_path = "yolo11n.pt"  # Use default
-            self.detector = ObjectDetector(model_path=str(model_path))
+            yolo_config = MODEL_CONFIG["yolo"]
+            self.detector = create_detector(
+                model_path=str(model_path),
+                classes=yolo_config["classes"] if yolo_config.get("restrict_classes") else None
+            )
             logger.info("Object detector initialized")
         except Exception as e:
             logger.error(f"Failed to initialize detector: {e}")
@@ -73,7 +91,10 @@ class VigilHome:
         # Scene Understanding
         if FEATURES.get("scene_understanding", True):
             try:
-                self.scene_understanding = SceneUnderstanding()
+                self.scene_understanding = create_scene_understanding()
+                if MODEL_CONFIG["vlm"].get("async_captions", True):
+                    # Caption in the background so detection never waits on the VLM
+                    self.caption_queue = CaptionQueue(self.scene_understanding)
                 logger.info("Scene understanding initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize scene understanding: {e}")
@@ -82,7 +103,7 @@ class VigilHome:
         if FEATURES.get("behavioral_baseline", True):
             try:
                 behavioral_data_dir = self.data_dir / "behavioral"
-                self.behavioral_analyzer = BehavioralAnalyzer(behavioral_data_dir)
+                self.behavioral_analyzer = BehavioralAnalyzer(behavioral_data_dir, incremental=True)
                 logger.info("Behavioral analyzer initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize behavioral analyzer: {e}")
@@ -92,6 +113,8 @@ class VigilHome:
             try:
                 search_data_dir = self.data_dir / "semantic_search"
                 self.semantic_search = create_search_engine(search_data_dir)
+                if CHROMA_CONFIG.get("index_queue", {}).get("enabled"):
+                    self.index_queue = IndexQueue(self.semantic_search)
                 logger.info("Semantic search initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize semantic search: {e}")
@@ -122,70 +145,118 @@ class VigilHome:
             "event_id": None
         }
         
+        # Decode once; every stage below works on the same Frame
+        frame = None
+        if image_path.exists():
+            try:
+                frame = Frame.from_path(image_path, camera, timestamp)
+            except Exception as e:
+                logger.error(f"Failed to decode frame: {e}")
+        
         # Step 1: Object Detection
-        if self.detector and image_path.exists():
+        if self.detector and frame is not None:
             try:
-                detections = self.detector.detect(image_path)
+                detections = self.detector.detect_for_camera(frame, camera)
                 results["detections"] = detections
                 logger.debug(f"Detected {len(detections)} objects in {camera}")
             except Exception as e:
                 logger.error(f"Detection failed: {e}")
         
-        # Step 2: Scene Understanding
-        if self.scene_understanding and image_path.exists():
-            try:
-                context = {
-                    "camera": camera,
-                    "time": timestamp.strftime("%H:%M"),
-                    "detections": results["detections"]
-                }
-                description = self.scene_understanding.describe_with_objects(
-                    image_path, results["detections"]
+        # Step 2: Scene Understanding (queued, or inline when async is off)
+        if self.scene_understanding and frame is not None:
+            if self.caption_queue is not None:
+                self.caption_queue.submit(
+                    frame, results["detections"],
+                    callback=lambda description: self._on_caption(results, image_path, description),
+                    camera=camera
                 )
-                results["description"] = description
-                logger.debug(f"Scene description: {description[:50]}...")
-            except Exception as e:
-                logger.error(f"Scene understanding failed: {e}")
+            else:
+                try:
+                    description = self.scene_understanding.describe_with_objects(
+                        frame, results["detections"]
+                    )
+                    results["description"] = description
+                    logger.debug(f"Scene description: {description[:50]}...")
+                except Exception as e:
+                    logger.error(f"Scene understanding failed: {e}")
         
         # Step 3: Behavioral Analysis
         if self.behavioral_analyzer:
             try:
                 # Record movement for each person detection
-                for det in results["detections"]:
-                    if det.get("class") == "person":
-                        event = self.behavioral_analyzer.record_movement(
-                            camera=camera,
-                            bbox=det["bbox"],
-                            confidence=det["confidence"],
-                            timestamp=timestamp
-                        )
-                        
-                        # Check for anomalies
-                        anomaly = self.behavioral_analyzer.detect_anomaly(event)
-                        if anomaly:
-                            results["anomaly"] = anomaly
-                            logger.warning(f"Anomaly detected: {anomaly['type']}")
+                for det in DetectionBatch.coerce(results["detections"]).persons():
+                    event = self.behavioral_analyzer.record_movement(
+                        camera=camera,
+                        bbox=det["bbox"],
+                        confidence=det["confidence"],
+                        timestamp=timestamp,
+                        frame_size=(frame.width, frame.height) if frame is not None else None
+                    )
+                    
+                    # Check for anomalies
+                    anomaly = self.behavioral_analyzer.detect_anomaly(event)
+                    if anomaly:
+                        results["anomaly"] = anomaly
+                        logger.warning(f"Anomaly detected: {anomaly['type']}")
             except Exception as e:
                 logger.error(f"Behavioral analysis failed: {e}")
         
-        # Step 4: Index for Semantic Search
-        if self.semantic_search and results["description"]:
-            try:
-                event_id = self.semantic_search.index_event(
-                    timestamp=timestamp,
-                    camera=camera,
-                    image_path=image_path,
-                    description=results["description"],
-                    detections=results["detections"],
-                    confidence=0.9
-                )
-                results["event_id"] = event_id
-                logger.debug(f"Indexed event {event_id}")
-            except Exception as e:
-                logger.error(f"Semantic indexing failed: {e}")
+        # Step 4: Index for Semantic Search (async captions index from the callback)
+        if results["description"]:
+            self._index_description(results, image_path)
         
         return results
     
+    def _on_caption(self, results: Dict[str, Any], image_path: Path, description: str):
+        """Attach a background caption to its frame result and index it"""
+        results["description"] = description
+        logger.debug(f"Scene description: {description[:50]}...")
+        self._index_description(results, image_path)
+    
+    def _index_description(self, results: Dict[str, Any], image_path: Path):
+        """Index a described frame for semantic search (in the background when queued)"""
+        if not self.semantic_search:
+            return
+        event = {
+            "timestamp": datetime.fromisoformat(results["timestamp"]),
+            "camera": results["camera"],
+            "image_path": image_path,
+            "description": results["description"],
+            "detections": list(results["detections"]),
+            "confidence": 0.9
+        }
+        if self.index_queue is not None:
+            self.index_queue.submit(event, lambda event_id: results.__setitem__("event_id", event_id))
+            return
+        try:
+            event_id = self.semantic_search.index_event(**event)
+            results["event_id"] = event_id
+            logger.debug(f"Indexed event {event_id}")
+        except Exception as e:
+            logger.error(f"Semantic indexing failed: {e}")
+    
+    def wait_for_captions(self, timeout: Optional[float] = None) -> bool:
+        """Block until queued captions have been generated and indexed"""
+        done = True
+        if self.caption_queue is not None:
+            done = self.caption_queue.wait_idle(timeout)
+        if self.index_queue is not None:
+            done = self.index_queue.flush(timeout) and done
+        return done
+    
+    def shutdown(self):
+        """Drain background work before exit"""
+        if self._shut_down:
+            return
+        self._shut_down = True
+        atexit.unregister(self.shutdown)
+        if self.caption_queue is not None:
+            self.caption_queue.close(drain=True)
+        if self.index_queue is not None:
+            self.index_queue.close(drain=True)
+        if self.behavioral_analyzer is not None:
+            self.behavioral_analyzer.close()
+    
     def search_events(self, query: str, **kwargs) -> list:
         """
         Search events using natural language.
@@ -213,13 +284,29 @@ class VigilHome:
             "features_enabled": FEATURES
         }
         
+        if self.detector and getattr(self.detector, "cache", None):
+            stats["detection_cache"] = self.detector.cache.get_stats()
+        
+        if self.scene_understanding and hasattr(self.scene_understanding, "get_latency_stats"):
+            stats["vlm_latency"] = self.scene_understanding.get_latency_stats()
+        
+        if self.caption_queue is not None:
+            stats["caption_queue"] = self.caption_queue.get_stats()
+        
+        if self.index_queue is not None:
+            stats["index_queue"] = self.index_queue.get_stats()
+        
+        if self.scene_understanding and getattr(self.scene_understanding, "caption_cache", None):
+            stats["caption_cache"] = self.scene_understanding.caption_cache.get_stats()
+        
         if self.semantic_search:
             stats["search"] = self.semantic_search.get_stats()
         
         if self.behavioral_analyzer:
             stats["behavioral"] = {
                 "has_sufficient_baseline": self.behavioral_analyzer.has_sufficient_baseline(),
-                "total_events": len(self.behavioral_analyzer.events)
+                "total_events": self.behavioral_analyzer.event_count(),
+                "event_writer": self.behavioral_analyzer.writer.get_stats()
             }
         
         return stats
@@ -302,6 +389,7 @@ def run_test():
         print(f"\n   Processing: {camera}/{image_path.name}")
         
         result = vigil.process_frame(image_path, camera)
+        vigil.wait_for_captions(timeout=120)  # So the description below is filled in
         results.append(result)
         
         # Print results
@@ -336,6 +424,8 @@ def run_test():
     if 'search' in stats:
         print(f"   Indexed events: {stats['search'].get('total_events', 0)}")
     
+    vigil.shutdown()
+    
     print("\n" + "=" * 60)
     print("Test Complete!")
     print("=" * 60)
@@ -0,0 +1,451 @@
+"""Model Server - Shared detection/captioning worker pool for all monitors
+
+Run once per host:
+
+    python src/model_server.py
+
+Monitors then use create_detector() / create_scene_understanding(), which
+return thin clients talking to the server over a Unix socket (or local
+models when the server is disabled or not running).
+"""
+import os
+import sys
+import stat
+import secrets
+import itertools
+import logging
+import threading
+import time
+import multiprocessing as mp
+from multiprocessing.connection import Listener, Client, Connection
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import INFERENCE_SERVER, MODEL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+AUTHKEY_BYTES = 32
+
+DETECTOR_OPS = {"detect", "detect_batch", "detect_for_camera"}
+CACHED_OPS = {"detect", "detect_batch"}  # Answered from ModelServer.cache when possible
+CAPTION_OPS = {"describe_scene", "describe_with_objects", "describe_batch",
+               "describe_with_objects_batch"}
+
+
+def _private_dir(path: Path) -> Path:
+    """Create (0700) or check a directory only the current user can use"""
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    info = path.stat()
+    if info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        raise PermissionError(f"{path} must be owned by this user with mode 0700")
+    return path
+
+
+def load_authkey(create: bool = False) -> bytes:
+    """
+    Connection secret shared by server and clients, read from
+    INFERENCE_SERVER["authkey_file"]. With create=True (the server), a random
+    key is generated on first start and stored with mode 0600.
+    """
+    path = Path(INFERENCE_SERVER["authkey_file"])
+    _private_dir(path.parent)
+    if create and not path.exists():
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass  # Another server created it first
+        else:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(secrets.token_bytes(AUTHKEY_BYTES))
+            logger.info(f"Generated model server key {path}")
+    info = path.stat()
+    if info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        raise PermissionError(f"{path} must be owned by this user with mode 0600")
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _worker_main(worker_id: int, requests, results, detector_kwargs: dict,
+                 caption: bool, threads: Optional[int]):
+    """Worker process: load models once, then serve requests until a None sentinel"""
+    logging.basicConfig(level=logging.INFO,
+                        format=f'%(asctime)s - worker{worker_id} - %(levelname)s - %(message)s')
+    try:
+        import torch
+        if threads:
+            torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    from detector import ObjectDetector
+    detector = ObjectDetector(**detector_kwargs)
+    scene = None
+    if caption:
+        from scene_understanding import SceneUnderstanding
+        scene = SceneUnderstanding(set_threads=False)  # Keep threads_per_worker
+    logger.info(f"Worker {worker_id} ready")
+
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        server_id, op, args, kwargs = request
+        try:
+            if op in DETECTOR_OPS:
+                # Each client brings its own threshold; cache keys include it
+                detector.conf_threshold = kwargs.pop("conf_threshold", detector.conf_threshold)
+                result = getattr(detector, op)(*args, **kwargs)
+            elif op in CAPTION_OPS and scene is not None:
+                result = getattr(scene, op)(*args, **kwargs)
+            else:
+                raise ValueError(f"Unsupported operation: {op}")
+            results.put((server_id, True, result))
+        except Exception as e:
+            results.put((server_id, False, f"{type(e).__name__}: {e}"))
+
+
+class ModelServer:
+    """
+    Unix-socket model server backed by a pool of worker processes.
+
+    Client connections are handled by one thread each; requests go to a
+    shared multiprocessing queue so whichever worker is free takes the next
+    one, and a dispatcher thread routes results back to the right client.
+    """
+
+    def __init__(self,
+                 socket_path: Optional[str] = None,
+                 workers: Optional[int] = None,
+                 authkey: Optional[bytes] = None,
+                 detector_kwargs: Optional[dict] = None,
+                 caption: Optional[bool] = None):
+        self.socket_path = str(socket_path or INFERENCE_SERVER["socket_path"])
+        self.num_workers = workers or INFERENCE_SERVER["workers"]
+        self.authkey = authkey or load_authkey(create=True)
+        self.detector_kwargs = detector_kwargs or {}
+        self.caption = INFERENCE_SERVER["caption"] if caption is None else caption
+
+        threads = INFERENCE_SERVER.get("threads_per_worker")
+        self.threads_per_worker = threads or max(1, (os.cpu_count() or 1) // self.num_workers)
+
+        self._ctx = mp.get_context("spawn")  # torch is not fork-safe
+        self.requests = self._ctx.Queue()
+        self.results = self._ctx.Queue()
+        self.workers: List[mp.Process] = []
+
+        # One detection cache for every client process: monitors reading the
+        # same newest frame run inference once
+        from detector import DetectionCache
+        self.cache = DetectionCache(MODEL_CONFIG["yolo"].get("cache_size", 256))
+
+        self._ids = itertools.count()
+        # server id -> ((conn, conn lock, client id), op, cache merge state)
+        self._pending: Dict[int, tuple] = {}
+        self._pending_lock = threading.Lock()
+        self._listener: Optional[Listener] = None
+        self._running = False
+        self.stats = {"requests": 0, "errors": 0, "clients": 0}
+
+    def start(self):
+        """Start workers and the result dispatcher"""
+        for worker_id in range(self.num_workers):
+            proc = self._ctx.Process(
+                target=_worker_main,
+                args=(worker_id, self.requests, self.results, self.detector_kwargs,
+                      self.caption, self.threads_per_worker),
+                daemon=True
+            )
+            proc.start()
+            self.workers.append(proc)
+        self._running = True
+        threading.Thread(target=self._dispatch_results, daemon=True).start()
+        logger.info(f"Started {self.num_workers} model workers "
+                    f"({self.threads_per_worker} threads each)")
+
+    def serve_forever(self):
+        """Accept client connections until shutdown()"""
+        if not self._running:
+            self.start()
+        _private_dir(Path(self.socket_path).parent)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._listener = Listener(self.socket_path, family="AF_UNIX", authkey=self.authkey)
+        logger.info(f"Model server listening on {self.socket_path}")
+        try:
+            while self._running:
+                try:
+                    conn = self._listener.accept()
+                except OSError:
+                    break
+                self.stats["clients"] += 1
+                threading.Thread(target=self._handle_client, args=(conn,), daemon=True).start()
+        finally:
+            self.shutdown()
+
+    def _handle_client(self, conn: Connection):
+        conn_lock = threading.Lock()
+        try:
+            while True:
+                client_id, op, args, kwargs = conn.recv()
+                if op == "ping":
+                    with conn_lock:
+                        conn.send((client_id, True, "pong"))
+                    continue
+                if op == "stats":
+                    with conn_lock:
+                        conn.send((client_id, True, self.get_stats()))
+                    continue
+                self._submit((conn, conn_lock, client_id), op, args, kwargs)
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _cache_keys(self, images: Sequence, conf_threshold) -> List[Optional[tuple]]:
+        """Cache keys from file identity (path, mtime, size); None for in-memory images"""
+        keys = []
+        for image in images:
+            path = getattr(image, "path", image)  # Frames carry their source path
+            try:
+                st = os.stat(path) if isinstance(path, (str, Path)) else None
+            except OSError:
+                st = None
+            keys.append(None if st is None else
+                        (conf_threshold, os.path.abspath(path), st.st_mtime_ns, st.st_size))
+        return keys
+
+    def _submit(self, target: tuple, op: str, args: tuple, kwargs: dict):
+        """Queue a request for the workers; detections already cached are answered here"""
+        merge = None
+        if op in CACHED_OPS:
+            images = [args[0]] if op == "detect" else list(args[0])
+            classes = kwargs.get("classes") or self.detector_kwargs.get("classes")
+            wanted = frozenset(classes) if classes else None
+            keys = self._cache_keys(images, kwargs.get("conf_threshold"))
+            cached = [self.cache.get(key, wanted) if key is not None else None for key in keys]
+            missing = [i for i, batch in enumerate(cached) if batch is None]
+            if not missing:
+                self._reply(target, True, cached[0] if op == "detect" else cached)
+                return
+            if op == "detect_batch":
+                args = ([images[i] for i in missing],) + tuple(args[1:])
+            merge = (cached, keys, wanted, missing)
+
+        server_id = next(self._ids)
+        with self._pending_lock:
+            self._pending[server_id] = (target, op, merge)
+        self.stats["requests"] += 1
+        self.requests.put((server_id, op, args, kwargs))
+
+    def _merge_cached(self, op: str, payload, merge: tuple):
+        """Fill a partly cached request with the worker's detections (and cache them)"""
+        cached, keys, wanted, missing = merge
+        fresh = [payload] if op == "detect" else payload
+        for i, batch in zip(missing, fresh):
+            cached[i] = batch
+            if keys[i] is not None:
+                self.cache.put(keys[i], wanted, batch)
+        return cached[0] if op == "detect" else cached
+
+    def _reply(self, target: tuple, ok: bool, payload):
+        conn, conn_lock, client_id = target
+        try:
+            with conn_lock:
+                conn.send((client_id, ok, payload))
+        except (OSError, ValueError):
+            pass  # Client went away
+
+    def _dispatch_results(self):
+        while self._running:
+            try:
+                item = self.results.get(timeout=1)
+            except Exception:
+                continue
+            server_id, ok, payload = item
+            with self._pending_lock:
+                entry = self._pending.pop(server_id, None)
+            if entry is None:
+                continue
+            target, op, merge = entry
+            if not ok:
+                self.stats["errors"] += 1
+            elif merge is not None:
+                payload = self._merge_cached(op, payload, merge)
+            self._reply(target, ok, payload)
+
+    def get_stats(self) -> Dict:
+        with self._pending_lock:
+            in_flight = len(self._pending)
+        return {
+            **self.stats,
+            "workers": self.num_workers,
+            "workers_alive": sum(p.is_alive() for p in self.workers),
+            "in_flight": in_flight,
+            "cache": self.cache.get_stats()
+        }
+
+    def shutdown(self):
+        """Stop workers and remove the socket"""
+        if not self._running:
+            return
+        self._running = False
+        for _ in self.workers:
+            self.requests.put(None)
+        for proc in self.workers:
+            proc.join(timeout=10)
+        if self._listener is not None:
+            self._listener.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        logger.info("Model server stopped")
+
+
+class ModelClient:
+    """Connection to a ModelServer; one request in flight at a time"""
+
+    def __init__(self, socket_path: Optional[str] = None, authkey: Optional[bytes] = None,
+                 timeout: Optional[float] = None):
+        self.socket_path = str(socket_path or INFERENCE_SERVER["socket_path"])
+        self.timeout = timeout or INFERENCE_SERVER["request_timeout"]
+        self._conn = Client(self.socket_path, family="AF_UNIX",
+                            authkey=authkey or load_authkey())
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def call(self, op: str, *args, **kwargs) -> Any:
+        with self._lock:
+            request_id = next(self._ids)
+            self._conn.send((request_id, op, args, kwargs))
+            deadline = time.monotonic() + self.timeout
+            while True:
+                if not self._conn.poll(max(0.0, deadline - time.monotonic())):
+                    raise TimeoutError(f"Model server did not answer '{op}' in {self.timeout}s")
+                response_id, ok, payload = self._conn.recv()
+                if response_id >= request_id:
+                    break
+                # Late reply to an earlier call that timed out
+                logger.debug(f"Discarding stale model server response {response_id}")
+        if response_id != request_id:
+            raise RuntimeError("Model server response out of order")
+        if not ok:
+            raise RuntimeError(payload)
+        return payload
+
+    def close(self):
+        self._conn.close()
+
+
+class RemoteObjectDetector:
+    """ObjectDetector API served by the shared model server"""
+
+    def __init__(self, client: ModelClient, conf_threshold: float = 0.5,
+                 classes: Optional[Sequence[str]] = None):
+        self.client = client
+        self.conf_threshold = conf_threshold
+        self.classes = list(classes) if classes else None
+        self.backend = "remote"
+        self.cache = None  # Caching happens in the server workers
+
+    def _call(self, op: str, *args, classes=None, **kwargs):
+        return self.client.call(op, *args, classes=classes or self.classes,
+                                conf_threshold=self.conf_threshold, **kwargs)
+
+    def detect(self, image_path, classes: Optional[Sequence[str]] = None):
+        return self._call("detect", image_path, classes=classes)
+
+    def detect_batch(self, images, batch_size: int = 16,
+                     classes: Optional[Sequence[str]] = None):
+        return self._call("detect_batch", list(images), batch_size=batch_size, classes=classes)
+
+    def detect_for_camera(self, image, camera: str, classes: Optional[Sequence[str]] = None):
+        return self._call("detect_for_camera", image, camera, classes=classes)
+
+    def detect_person(self, image_path) -> bool:
+        return self.get_person_count(image_path) > 0
+
+    def get_person_count(self, image_path) -> int:
+        return len(self.detect(image_path, classes=["person"]).persons())
+
+
+class RemoteSceneUnderstanding:
+    """SceneUnderstanding API served by the shared model server"""
+
+    def __init__(self, client: ModelClient):
+        self.client = client
+
+    def describe_scene(self, image_path, context: Optional[dict] = None) -> str:
+        return self.client.call("describe_scene", image_path, context)
+
+    def describe_with_objects(self, image_path, detections, camera: Optional[str] = None) -> str:
+        return self.client.call("describe_with_objects", image_path, detections, camera)
+
+    def describe_batch(self, images, contexts=None) -> List[str]:
+        return self.client.call("describe_batch", list(images), contexts)
+
+    def describe_with_objects_batch(self, images, detections, cameras=None) -> List[str]:
+        return self.client.call("describe_with_objects_batch", list(images), list(detections),
+                                cameras)
+
+
+def _connect() -> Optional[ModelClient]:
+    """Client for the shared server, or None if disabled/unreachable"""
+    if not INFERENCE_SERVER.get("enabled"):
+        return None
+    try:
+        client = ModelClient()
+        client.call("ping")
+        return client
+    except Exception as e:
+        logger.warning(f"Model server unavailable, using local models: {e}")
+        return None
+
+
+def create_detector(model_path: str = "yolo11n.pt", conf_threshold: float = 0.5,
+                    classes: Optional[Sequence[str]] = None):
+    """
+    Factory for a detector: remote client when the model server is up,
+    otherwise a local ObjectDetector.
+    """
+    client = _connect()
+    if client is not None:
+        logger.info("Using shared model server for detection")
+        return RemoteObjectDetector(client, conf_threshold=conf_threshold, classes=classes)
+
+    from detector import ObjectDetector
+    return ObjectDetector(model_path=model_path, conf_threshold=conf_threshold, classes=classes)
+
+
+def create_scene_understanding():
+    """
+    Factory for scene understanding: remote client when the model server
+    serves captions, otherwise a local SceneUnderstanding.
+    """
+    if INFERENCE_SERVER.get("caption"):
+        client = _connect()
+        if client is not None:
+            logger.info("Using shared model server for scene understanding")
+            return RemoteSceneUnderstanding(client)
+
+    from scene_understanding import SceneUnderstanding
+    return SceneUnderstanding()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    from config import MODELS_DIR, MODEL_CONFIG
+
+    model_path = MODELS_DIR / MODEL_CONFIG["yolo"]["model"]
+    server = ModelServer(detector_kwargs={
+        "model_path": str(model_path) if model_path.exists() else MODEL_CONFIG["yolo"]["model"],
+        "conf_threshold": MODEL_CONFIG["yolo"]["conf_threshold"]
+    })
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -10,7 +10,7 @@ import json
 import logging
 from pathlib import Path
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, deque
 from typing import Set, Dict, Optional
 
 # Setup logging
@@ -27,9 +27,13 @@ logger = logging.getLogger(__name__)
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from detector import ObjectDetector
-from scene_understanding import SceneUnderstanding
+from config import CAMERAS
+from detector import DetectionBatch
+from motion_gate import MotionGate
+from model_server import create_detector, create_scene_understanding
+from caption_queue import CaptionQueue
 from behavioral_analyzer import BehavioralAnalyzer, MovementEvent
+from event_writer import exit_on_sigterm
 
 
 class RealtimeMonitor:
@@ -40,13 +44,15 @@ class RealtimeMonitor:
                  data_dir: str = "/Users/augustosilva/clawd/projects/video-surveillance-rnd/data",
                  conf_threshold: float = 0.5,
                  rate_limit_seconds: int = 30,
-                 status_interval_minutes: int = 5):
+                 status_interval_minutes: int = 5,
+                 batch_size: int = 16):
         
         self.captures_dir = Path(captures_dir)
         self.data_dir = Path(data_dir)
         self.conf_threshold = conf_threshold
         self.rate_limit_seconds = rate_limit_seconds
         self.status_interval = timedelta(minutes=status_interval_minutes)
+        self.batch_size = batch_size
         
         # State tracking
         self.processed_images: Set[str] = set()
@@ -55,6 +61,7 @@ class RealtimeMonitor:
             "images_processed": 0,
             "persons_detected": 0,
             "alerts_sent": 0,
+            "frames_skipped": 0,
             "errors": 0
         }
         
@@ -63,7 +70,7 @@ class RealtimeMonitor:
         logger.info(f"Captures directory: {self.captures_dir}")
         
         try:
-            self.detector = ObjectDetector(
+            self.detector = create_detector(
                 model_path="/Users/augustosilva/clawd/projects/video-surveillance-rnd/yolo11n.pt",
                 conf_threshold=self.conf_threshold
             )
@@ -73,19 +80,27 @@ class RealtimeMonitor:
             raise
         
         try:
-            self.scene = SceneUnderstanding()
+            self.scene = create_scene_understanding()
             logger.info("✅ Scene understanding loaded")
         except Exception as e:
             logger.error(f"❌ Failed to load scene understanding: {e}")
             self.scene = None
         
+        # Captions run in the background; alerts go out as soon as YOLO finishes
+        self.caption_queue = CaptionQueue(self.scene) if self.scene else None
+        self.caption_followups: deque = deque()  # Filled from the caption thread
+        
         try:
-            self.analyzer = BehavioralAnalyzer(self.data_dir, min_baseline_days=0)
+            self.analyzer = BehavioralAnalyzer(self.data_dir, min_baseline_days=0,
+                                               incremental=True)
             logger.info("✅ Behavioral analyzer loaded")
         except Exception as e:
             logger.error(f"❌ Failed to load behavioral analyzer: {e}")
             self.analyzer = None
         
+        # Skip detection on frames where nothing changed
+        self.motion_gate = MotionGate()
+        
         self.last_status_time = datetime.now()
         logger.info("🚀 VigilHome Monitor initialized successfully")
     
@@ -156,15 +171,16 @@ class RealtimeMonitor:
         except Exception as e:
             logger.error(f"Failed to queue alert: {e}")
     
-    def process_image(self, image_path: Path, camera: str) -> bool:
+    def process_image(self, image_path: Path, camera: str,
+                      detections: Optional[DetectionBatch] = None) -> bool:
         """Process a single image for person detection"""
         try:
-            # Run detection
-            detections = self.detector.detect(image_path)
+            # Run detection (unless already done in a batch)
+            if detections is None:
+                detections = self.detector.detect_for_camera(image_path, camera)
             
-            # Filter for persons with confidence > threshold
-            persons = [d for d in detections 
-                      if d["class"] == "person" and d["confidence"] > self.conf_threshold]
+            # Filter for persons with confidence >= threshold
+            persons = DetectionBatch.coerce(detections).persons().filter(self.conf_threshold)
             
             if not persons:
                 return False
@@ -172,25 +188,25 @@ class RealtimeMonitor:
             person_count = len(persons)
             logger.info(f"🚶 Person detected in {camera}: {person_count} person(s)")
             
-            # Generate scene description
             description = "Pessoa detetada na área de vigilância"
-            if self.scene:
-                try:
-                    context = {"camera": camera, "time": datetime.now().strftime("%H:%M:%S")}
-                    description = self.scene.describe_with_objects(image_path, detections)
-                    logger.info(f"📝 Scene description: {description}")
-                except Exception as e:
-                    logger.warning(f"Scene description failed: {e}")
             
             # Log to behavioral analyzer
             if self.analyzer:
                 try:
+                    # Positions are binned relative to the frame; read its size
+                    # from the image header the first time a camera is seen
+                    frame_size = None
+                    if not self.analyzer.has_frame_size(camera):
+                        from PIL import Image
+                        with Image.open(image_path) as image:
+                            frame_size = image.size
                     for person in persons:
                         event = self.analyzer.record_movement(
                             camera=camera,
                             bbox=person["bbox"],
                             confidence=person["confidence"],
-                            timestamp=datetime.now()
+                            timestamp=datetime.now(),
+                            frame_size=frame_size
                         )
                         # Check for anomalies
                         anomaly = self.analyzer.detect_anomaly(event)
@@ -200,11 +216,20 @@ class RealtimeMonitor:
                     logger.warning(f"Behavioral analysis failed: {e}")
             
             # Send alert if rate limit allows
-            if self.check_rate_limit(camera):
+            alerted = self.check_rate_limit(camera)
+            if alerted:
                 self.send_telegram_alert(camera, image_path, person_count, description)
             else:
                 logger.info(f"⏱️ Rate limit active for {camera}, skipping alert")
             
+            # Generate scene description in the background
+            if self.caption_queue:
+                self.caption_queue.submit(
+                    image_path, detections,
+                    callback=lambda desc: self._on_caption(camera, desc, alerted),
+                    camera=camera
+                )
+            
             self.stats["persons_detected"] += person_count
             return True
             
@@ -213,6 +238,16 @@ class RealtimeMonitor:
             self.stats["errors"] += 1
             return False
     
+    def _on_caption(self, camera: str, description: str, alerted: bool):
+        """Caption thread callback: log it and follow up on the alert it belongs to"""
+        logger.info(f"📝 Scene description ({camera}): {description}")
+        if alerted:
+            self.caption_followups.append({
+                "action": "send",
+                "target": "-5291006422",
+                "message": f"📝 {camera}: {description}"
+            })
+    
     def send_status_report(self):
         """Send periodic status report"""
         try:
@@ -223,6 +258,7 @@ class RealtimeMonitor:
             message += f"📸 Images processed: {self.stats['images_processed']}\n"
             message += f"🚶 Persons detected: {self.stats['persons_detected']}\n"
             message += f"📤 Alerts sent: {self.stats['alerts_sent']}\n"
+            message += f"💤 Frames skipped (no motion): {self.stats['frames_skipped']}\n"
             message += f"❌ Errors: {self.stats['errors']}\n\n"
             message += "_Monitor running normally_ ✅"
             
@@ -254,17 +290,46 @@ class RealtimeMonitor:
             logger.warning("No camera directories found")
             return []
         
+        # Collect the whole backlog so detection runs in batches
+        queued = []
         for camera_dir in camera_dirs:
             camera = camera_dir.name
             new_images = self.get_new_images(camera_dir)
             
+            # Gate oldest-first so the rolling background follows capture order
+            changed = set()
+            for img_path in reversed(new_images):
+                if self.motion_gate.has_changed(camera, img_path):
+                    changed.add(img_path)
+                else:
+                    self.stats["frames_skipped"] += 1
+            
             for img_path in new_images:
                 # Mark as processed immediately to avoid reprocessing
                 self.processed_images.add(str(img_path))
                 self.stats["images_processed"] += 1
-                
-                # Process the image
-                self.process_image(img_path, camera)
+                if img_path in changed:
+                    queued.append((img_path, camera))
+        
+        # Full-frame cameras share batched passes; zone/tiled cameras run their own crops
+        full_frame, regional = [], []
+        for img_path, camera in queued:
+            mode = CAMERAS.get(camera, {}).get("detection_mode", "full")
+            (full_frame if mode == "full" else regional).append((img_path, camera))
+        if full_frame:
+            batch_detections = self.detector.detect_batch(
+                [img_path for img_path, _ in full_frame],
+                batch_size=self.batch_size
+            )
+            for (img_path, camera), detections in zip(full_frame, batch_detections):
+                self.process_image(img_path, camera, detections=detections)
+        
+        for img_path, camera in regional:
+            self.process_image(img_path, camera)
+        
+        # Captions that finished since the last cycle
+        while self.caption_followups:
+            self.pending_alerts.append(self.caption_followups.popleft())
         
         # Check for status report
         self.check_status_report()
@@ -275,6 +340,7 @@ class RealtimeMonitor:
         """Run the monitor indefinitely"""
         self.start_time = datetime.now()
         logger.info(f"🚀 Starting VigilHome Monitor (interval: {interval_seconds}s)")
+        exit_on_sigterm()  # monitor_control.sh stop sends SIGTERM
         
         try:
             while True:
@@ -305,9 +371,18 @@ class RealtimeMonitor:
                 
         except KeyboardInterrupt:
             logger.info("🛑 Monitor stopped by user")
+        except SystemExit:
+            logger.info("🛑 Monitor stopped")
+            raise
         except Exception as e:
             logger.error(f"Monitor crashed: {e}", exc_info=True)
             raise
+        finally:
+            # Flush buffered events and checkpoint pattern stats on every exit path
+            if self.caption_queue:
+                self.caption_queue.close(drain=False)
+            if self.analyzer:
+                self.analyzer.close()
 
 
 def main():
@@ -1,19 +1,52 @@
 """Scene Understanding Module - VLM for natural language descriptions"""
 import logging
+import time
+from collections import deque
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Sequence, Union
 import base64
 import torch
 
+from frame import Frame
+from detector import DetectionBatch
+from config import MODEL_CONFIG
+from caption_cache import CaptionCache, perceptual_hash
+
 logger = logging.getLogger(__name__)
 
+UNAVAILABLE_CAPTION = "Scene understanding not available"
+ERROR_CAPTION = "Error analyzing scene"
+
 class SceneUnderstanding:
     """Generate natural language descriptions of surveillance scenes"""
     
-    def __init__(self, model_name: str = "minicpm-v"):
+    def __init__(self, model_name: str = "minicpm-v", max_batch_size: Optional[int] = None,
+                 set_threads: bool = True):
+        """
+        Args:
+            model_name: VLM name
+            max_batch_size: Frames per generate() call
+            set_threads: Apply cpu_profile num_threads. torch's thread count is
+                process-wide, so pass False where the process owns it (model
+                server workers set threads_per_worker)
+        """
         self.model_name = model_name
+        self.max_batch_size = max_batch_size or MODEL_CONFIG["vlm"].get("max_batch_size", 8)
+        self.set_threads = set_threads
         self.model = None
         self.processor = None
+        self.device = "cpu"
+        self._latencies: deque = deque(maxlen=200)  # Seconds per caption, recent calls
+        
+        cache_config = MODEL_CONFIG["vlm"].get("caption_cache", {})
+        self.caption_cache = None
+        if cache_config.get("enabled", True):
+            self.caption_cache = CaptionCache(
+                max_hamming=cache_config.get("max_hamming", 6),
+                max_entries_per_camera=cache_config.get("max_entries_per_camera", 32),
+                ttl_seconds=cache_config.get("ttl_seconds", 600)
+            )
+        
         self._load_model()
     
     def _load_model(self):
@@ -26,83 +59,192 @@ class SceneUnderstanding:
             self.processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
             self.model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
             
-            # Move to MPS if available (Apple Silicon)
-            try:
-                import torch
-                if torch.backends.mps.is_available():
-                    self.model = self.model.to("mps")
-                    logger.info("Model moved to MPS (Apple Silicon)")
-                else:
-                    logger.info("Running on CPU")
-            except:
-                pass
-                
+            # Move to MPS if available (Apple Silicon), otherwise tune for CPU
+            if torch.backends.mps.is_available():
+                self.model = self.model.to("mps")
+                self.device = "mps"
+                logger.info("Model moved to MPS (Apple Silicon)")
+            else:
+                self._apply_cpu_profile()
+            
+            self.model.eval()
             logger.info("Loaded BLIP image captioning model")
         except Exception as e:
             logger.error(f"Failed to load VLM: {e}")
             self.model = None
             self.processor = None
+            return
+        
+        if MODEL_CONFIG["vlm"].get("cpu_profile", {}).get("warmup", True):
+            self._warmup()
     
-    def describe_scene(self, image_path: Path, context: Optional[dict] = None) -> str:
+    def _apply_cpu_profile(self):
+        """Thread budget and dynamic int8 quantization for CPU-only hosts"""
+        profile = MODEL_CONFIG["vlm"].get("cpu_profile", {})
+        
+        num_threads = profile.get("num_threads")
+        if num_threads and self.set_threads:
+            # Process-wide: also caps YOLO and the embedder running in this process
+            torch.set_num_threads(num_threads)
+        
+        if profile.get("quantize_int8", True):
+            self.model = torch.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        
+        logger.info(f"Running on CPU (threads={torch.get_num_threads()}, "
+                    f"int8={profile.get('quantize_int8', True)})")
+    
+    def _warmup(self):
+        """One throwaway caption so the first real frame isn't slow"""
+        from PIL import Image
+        start = time.perf_counter()
+        self.describe_batch([Image.new("RGB", (384, 384))])
+        self._latencies.clear()
+        logger.info(f"VLM warm-up took {time.perf_counter() - start:.2f}s")
+    
+    def get_latency_stats(self) -> dict:
+        """Measured seconds per caption over recent calls"""
+        if not self._latencies:
+            return {"captions": 0}
+        ordered = sorted(self._latencies)
+        return {
+            "captions": len(ordered),
+            "device": self.device,
+            "avg_seconds": round(sum(ordered) / len(ordered), 3),
+            "p50_seconds": round(ordered[len(ordered) // 2], 3),
+            "p95_seconds": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3)
+        }
+    
+    def describe_scene(self, image_path: Union[Path, Frame],
+                       context: Optional[dict] = None) -> str:
         """
         Generate natural language description of scene
         
         Args:
-            image_path: Path to image file
+            image_path: Path to image file or an already-decoded Frame
             context: Optional context (camera name, time, previous detections)
         
         Returns:
             Natural language description
         """
+        return self.describe_batch([image_path], [context])[0]
+    
+    def describe_batch(self, images: Sequence[Union[Path, Frame]],
+                       contexts: Optional[Sequence[Optional[dict]]] = None) -> List[str]:
+        """
+        Caption several frames with one generate() call per chunk
+        
+        Args:
+            images: Paths and/or decoded Frames
+            contexts: Optional per-image context dicts (same length as images)
+        
+        Returns:
+            One description per image, in input order
+        """
+        contexts = list(contexts) if contexts is not None else [None] * len(images)
+        if len(contexts) != len(images):
+            raise ValueError(f"Got {len(contexts)} contexts for {len(images)} images")
+        
         if not self.model or not self.processor:
-            return "Scene understanding not available"
+            return [UNAVAILABLE_CAPTION] * len(images)
         
-        try:
-            from PIL import Image
-            
-            # Load and process image
-            image = Image.open(image_path).convert("RGB")
-            inputs = self.processor(image, return_tensors="pt")
-            
-            # Move inputs to same device as model
-            if hasattr(self.model, 'device'):
-                inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
-            
-            # Generate caption
-            with torch.no_grad():
-                output = self.model.generate(**inputs, max_new_tokens=50)
-            
-            description = self.processor.decode(output[0], skip_special_tokens=True)
-            
-            # Enhance with context if available
+        descriptions: List[str] = []
+        
+        for start in range(0, len(images), self.max_batch_size):
+            chunk = images[start:start + self.max_batch_size]
+            try:
+                # Load and process images (reuse decoded frames if given)
+                pil_images = [self._load_image(img) for img in chunk]
+                inputs = self.processor(images=pil_images, return_tensors="pt")
+                
+                # Move inputs to same device as model
+                if hasattr(self.model, 'device'):
+                    inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
+                
+                # Generate captions for the whole chunk
+                started = time.perf_counter()
+                with torch.no_grad():
+                    output = self.model.generate(**inputs, max_new_tokens=50)
+                per_caption = (time.perf_counter() - started) / len(chunk)
+                self._latencies.extend([per_caption] * len(chunk))
+                
+                descriptions.extend(self.processor.batch_decode(output, skip_special_tokens=True))
+            except Exception as e:
+                logger.error(f"Scene description failed: {e}")
+                descriptions.extend([ERROR_CAPTION] * len(chunk))
+        
+        # Enhance with context if available
+        for i, context in enumerate(contexts):
             if context:
                 camera = context.get("camera", "Unknown")
-                time = context.get("time", "")
-                description = f"[{camera}] {description}"
-            
-            return description
-        except Exception as e:
-            logger.error(f"Scene description failed: {e}")
-            return "Error analyzing scene"
+                descriptions[i] = f"[{camera}] {descriptions[i]}"
+        
+        return descriptions
+    
+    @staticmethod
+    def _load_image(image_path: Union[Path, Frame]):
+        """Return an RGB PIL image for a path or Frame (PIL images pass through)"""
+        if isinstance(image_path, Frame):
+            return image_path.to_pil()
+        if hasattr(image_path, "convert"):
+            return image_path.convert("RGB")
+        from PIL import Image
+        return Image.open(image_path).convert("RGB")
     
-    def describe_with_objects(self, image_path: Path, detections: list) -> str:
+    def describe_with_objects(self, image_path: Union[Path, Frame], detections: list,
+                              camera: Optional[str] = None) -> str:
         """
         Generate description incorporating object detections
         
         Args:
-            image_path: Path to image
-            detections: List of detection dicts from ObjectDetector
+            image_path: Path to image or an already-decoded Frame
+            detections: DetectionBatch (or list of detection dicts) from ObjectDetector
+            camera: Camera name for the caption cache (taken from the Frame if omitted)
         
         Returns:
             Rich description with objects
         """
-        base_desc = self.describe_scene(image_path)
+        return self.describe_with_objects_batch([image_path], [detections], [camera])[0]
+    
+    def describe_with_objects_batch(self, images: Sequence[Union[Path, Frame]],
+                                    detections: Sequence,
+                                    cameras: Optional[Sequence[Optional[str]]] = None) -> List[str]:
+        """
+        Batched describe_with_objects (one detection list per image).
+        
+        Frames that look like a recent frame from the same camera (perceptual
+        hash within the cache's Hamming distance) with the same object counts
+        reuse that caption instead of running the VLM.
+        """
+        cameras = list(cameras) if cameras is not None else [None] * len(images)
+        captions: List[Optional[str]] = [None] * len(images)
+        cache_keys: List[Optional[tuple]] = [None] * len(images)
         
-        # Add object information
-        object_counts = {}
-        for det in detections:
-            cls = det["class"]
-            object_counts[cls] = object_counts.get(cls, 0) + 1
+        if self.caption_cache is not None:
+            for i, (image, dets, camera) in enumerate(zip(images, detections, cameras)):
+                camera = camera or (image.camera if isinstance(image, Frame) else None)
+                phash = perceptual_hash(image) if camera else None
+                if phash is None:
+                    continue
+                objects = CaptionCache.objects_key(DetectionBatch.coerce(dets).count_by_class())
+                cache_keys[i] = (camera, phash, objects)
+                captions[i] = self.caption_cache.get(*cache_keys[i])
+        
+        misses = [i for i, caption in enumerate(captions) if caption is None]
+        if misses:
+            fresh = self.describe_batch([images[i] for i in misses])
+            for i, caption in zip(misses, fresh):
+                captions[i] = caption
+                if cache_keys[i] is not None and caption not in (ERROR_CAPTION, UNAVAILABLE_CAPTION):
+                    self.caption_cache.put(*cache_keys[i], caption)
+        
+        return [self._with_objects(caption, dets) for caption, dets in zip(captions, detections)]
+    
+    @staticmethod
+    def _with_objects(base_desc: str, detections) -> str:
+        """Append detected object counts to a caption"""
+        object_counts = DetectionBatch.coerce(detections).count_by_class()
         
         if object_counts:
             objects_str = ", ".join([f"{n} {c}" for c, n in object_counts.items()])
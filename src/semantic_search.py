@@ -1,14 +1,20 @@
 """Semantic Search Module - Vector-based search for surveillance events"""
 import json
 import logging
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 import hashlib
 
 logger = logging.getLogger(__name__)
 
+# Collection metadata "schema_version": 2 = every event carries numeric "ts"
+SCHEMA_VERSION = 2
+
 
 @dataclass
 class SceneEvent:
@@ -58,7 +64,11 @@ class SemanticSearch:
     def __init__(self, 
                  persist_directory: Path,
                  collection_name: str = "vigilhome_events",
-                 embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"):
+                 embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 batch_size: int = 64,
+                 query_cache_size: int = 256,
+                 result_cache_ttl: float = 30.0,
+                 result_cache_size: int = 128):
         """
         Initialize semantic search.
         
@@ -66,10 +76,27 @@ class SemanticSearch:
             persist_directory: Directory for ChromaDB persistence
             collection_name: Name of the ChromaDB collection
             embedding_model: HuggingFace embedding model name
+            batch_size: Texts per forward pass when embedding in bulk
+            query_cache_size: Query embeddings kept (LRU)
+            result_cache_ttl: Seconds a search result is reused (0 disables);
+                any indexing or deletion clears the result cache
+            result_cache_size: Search results kept
         """
         self.persist_directory = Path(persist_directory)
         self.collection_name = collection_name
         self.embedding_model_name = embedding_model
+        self.batch_size = batch_size
+        
+        # Query embedding LRU and short-lived result cache
+        self.query_cache_size = query_cache_size
+        self.result_cache_ttl = result_cache_ttl
+        self.result_cache_size = result_cache_size
+        self._query_embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._results: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (created, results)
+        self._cache_lock = threading.Lock()
+        self._generation = 0  # Bumped on every invalidation
+        self.cache_stats = {"embedding_hits": 0, "embedding_misses": 0,
+                            "result_hits": 0, "result_misses": 0, "invalidations": 0}
         
         self.persist_directory.mkdir(parents=True, exist_ok=True)
         
@@ -93,11 +120,20 @@ class SemanticSearch:
                 path=str(self.persist_directory)
             )
             
-            # Get or create collection
-            self.collection = self.client.get_or_create_collection(
-                name=self.collection_name,
-                metadata={"description": "VigilHome surveillance events"}
-            )
+            # Get or create collection. Not get_or_create_collection(): it
+            # overwrites stored metadata, hiding the version of an old collection
+            try:
+                self.collection = self.client.get_collection(name=self.collection_name)
+            except Exception:
+                self.collection = self.client.create_collection(
+                    name=self.collection_name,
+                    metadata={"description": "VigilHome surveillance events",
+                              "schema_version": SCHEMA_VERSION}
+                )
+            
+            # schema_version is only raised by a completed migration
+            if (self.collection.metadata or {}).get("schema_version", 1) < SCHEMA_VERSION:
+                self.migrate_epoch_metadata()
             
             logger.info(f"ChromaDB collection '{self.collection_name}' ready")
             
@@ -127,6 +163,68 @@ class SemanticSearch:
         embedding = self.embedding_model.encode(text, convert_to_numpy=True)
         return embedding.tolist()
     
+    def _generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Embed many texts in batches of self.batch_size"""
+        self._init_embeddings()
+        
+        if self.embedding_model is None:
+            raise RuntimeError("Embedding model not available")
+        
+        embeddings = self.embedding_model.encode(texts, batch_size=self.batch_size,
+                                                 convert_to_numpy=True)
+        return embeddings.tolist()
+    
+    def _query_embedding(self, query: str) -> List[float]:
+        """Embedding of a search query, from the LRU cache when repeated"""
+        key = " ".join(query.lower().split())
+        with self._cache_lock:
+            embedding = self._query_embeddings.get(key)
+            if embedding is not None:
+                self._query_embeddings.move_to_end(key)
+                self.cache_stats["embedding_hits"] += 1
+                return embedding
+            self.cache_stats["embedding_misses"] += 1
+        
+        embedding = self._generate_embedding(key)
+        with self._cache_lock:
+            self._query_embeddings[key] = embedding
+            while len(self._query_embeddings) > self.query_cache_size:
+                self._query_embeddings.popitem(last=False)
+        return embedding
+    
+    @staticmethod
+    def _result_key(query: str, start_time: Optional[datetime], end_time: Optional[datetime],
+                    cameras: Optional[List[str]], n_results: int) -> tuple:
+        # Minute resolution, so relative ranges ("last hour" ends at now) repeat
+        def minute(t):
+            return t.replace(second=0, microsecond=0).isoformat() if t else None
+        return (" ".join(query.lower().split()), minute(start_time), minute(end_time),
+                tuple(sorted(cameras)) if cameras else None, n_results)
+    
+    def _invalidate_results(self):
+        """Drop cached search results (the collection changed)"""
+        with self._cache_lock:
+            self._generation += 1
+            if self._results:
+                self._results.clear()
+                self.cache_stats["invalidations"] += 1
+    
+    def get_cache_stats(self) -> Dict:
+        with self._cache_lock:
+            stats = dict(self.cache_stats)
+            entries = (len(self._query_embeddings), len(self._results))
+        embedding_total = stats["embedding_hits"] + stats["embedding_misses"]
+        result_total = stats["result_hits"] + stats["result_misses"]
+        return {
+            **stats,
+            "embedding_entries": entries[0],
+            "result_entries": entries[1],
+            "embedding_hit_rate": round(stats["embedding_hits"] / embedding_total, 4)
+            if embedding_total else 0.0,
+            "result_hit_rate": round(stats["result_hits"] / result_total, 4)
+            if result_total else 0.0
+        }
+    
     def _generate_event_id(self, timestamp: datetime, camera: str, 
                           image_path: Path) -> str:
         """Generate unique event ID"""
@@ -154,10 +252,19 @@ class SemanticSearch:
         Returns:
             Event ID
         """
-        if self.collection is None:
-            logger.error("ChromaDB not initialized")
-            return ""
-        
+        return self.index_events([{
+            "timestamp": timestamp,
+            "camera": camera,
+            "image_path": image_path,
+            "description": description,
+            "detections": detections,
+            "confidence": confidence
+        }])[0]
+    
+    def _prepare_event(self, timestamp: datetime, camera: str, image_path: Path,
+                       description: str, detections: Optional[List[Dict]] = None,
+                       confidence: float = 1.0, **_) -> tuple:
+        """(event_id, document to embed, metadata) for one event"""
         event_id = self._generate_event_id(timestamp, camera, image_path)
         
         # Create enhanced description for embedding
@@ -167,16 +274,9 @@ class SemanticSearch:
             enhanced_description += f" Objects: {', '.join(objects)}."
         enhanced_description += f" Camera: {camera}. Time: {timestamp.strftime('%H:%M')}."
         
-        # Generate embedding
-        try:
-            embedding = self._generate_embedding(enhanced_description)
-        except Exception as e:
-            logger.error(f"Failed to generate embedding: {e}")
-            return ""
-        
-        # Prepare metadata
         metadata = {
             "timestamp": timestamp.isoformat(),
+            "ts": timestamp.timestamp(),  # Numeric, for range filters in the query
             "camera": camera,
             "image_path": str(image_path),
             "description": description,
@@ -185,20 +285,51 @@ class SemanticSearch:
             "hour": timestamp.hour,
             "day_of_week": timestamp.weekday()
         }
+        return event_id, enhanced_description, metadata
+    
+    def index_events(self, events: List[Union[Dict, SceneEvent]]) -> List[str]:
+        """
+        Index many events with one batched embedding pass and one upsert.
+        
+        Args:
+            events: index_event() keyword dicts or SceneEvent objects
+        
+        Returns:
+            Event IDs in input order ("" for every event if indexing failed)
+        """
+        if self.collection is None:
+            logger.error("ChromaDB not initialized")
+            return [""] * len(events)
+        if not events:
+            return []
+        
+        prepared = [self._prepare_event(**(e.__dict__ if isinstance(e, SceneEvent) else e))
+                    for e in events]
+        event_ids = [p[0] for p in prepared]
         
-        # Add to ChromaDB
+        # Generate embeddings
         try:
-            self.collection.add(
-                ids=[event_id],
-                embeddings=[embedding],
-                documents=[enhanced_description],
-                metadatas=[metadata]
+            embeddings = self._generate_embeddings([p[1] for p in prepared])
+        except Exception as e:
+            logger.error(f"Failed to generate embeddings: {e}")
+            return [""] * len(events)
+        
+        # One write; a repeated ID keeps its last occurrence
+        last = {event_id: i for i, event_id in enumerate(event_ids)}
+        rows = sorted(last.values())
+        try:
+            self.collection.upsert(
+                ids=[event_ids[i] for i in rows],
+                embeddings=[embeddings[i] for i in rows],
+                documents=[prepared[i][1] for i in rows],
+                metadatas=[prepared[i][2] for i in rows]
             )
-            logger.debug(f"Indexed event {event_id}")
-            return event_id
+            self._invalidate_results()
+            logger.debug(f"Indexed {len(rows)} events")
+            return event_ids
         except Exception as e:
-            logger.error(f"Failed to index event: {e}")
-            return ""
+            logger.error(f"Failed to index events: {e}")
+            return [""] * len(events)
     
     def search(self, 
               query: str,
@@ -223,28 +354,30 @@ class SemanticSearch:
             logger.error("ChromaDB not initialized")
             return []
         
+        key = self._result_key(query, start_time, end_time, cameras, n_results)
+        generation = self._generation
+        if self.result_cache_ttl > 0:
+            with self._cache_lock:
+                cached = self._results.get(key)
+                if cached is not None and time.monotonic() - cached[0] <= self.result_cache_ttl:
+                    self._results.move_to_end(key)
+                    self.cache_stats["result_hits"] += 1
+                    return [dict(r) for r in cached[1]]
+                self.cache_stats["result_misses"] += 1
+        
         # Generate query embedding
         try:
-            query_embedding = self._generate_embedding(query)
+            query_embedding = self._query_embedding(query)
         except Exception as e:
             logger.error(f"Failed to generate query embedding: {e}")
             return []
         
-        # Build where clause for filtering
-        where_clause = {}
-        
-        if cameras:
-            if len(cameras) == 1:
-                where_clause["camera"] = cameras[0]
-            else:
-                where_clause["$or"] = [{"camera": c} for c in cameras]
-        
         # Execute search
         try:
             results = self.collection.query(
                 query_embeddings=[query_embedding],
                 n_results=n_results,
-                where=where_clause if where_clause else None,
+                where=self._build_where(start_time, end_time, cameras),
                 include=["metadatas", "documents", "distances"]
             )
             
@@ -259,14 +392,6 @@ class SemanticSearch:
                     # Convert distance to similarity score (0-1)
                     similarity = 1.0 - (distance / 2.0)
                     
-                    # Apply time filtering post-query if needed
-                    event_time = datetime.fromisoformat(metadata['timestamp'])
-                    
-                    if start_time and event_time < start_time:
-                        continue
-                    if end_time and event_time > end_time:
-                        continue
-                    
                     formatted_results.append({
                         "event_id": event_id,
                         "timestamp": metadata['timestamp'],
@@ -278,12 +403,76 @@ class SemanticSearch:
                         "matched_text": document
                     })
             
+            if self.result_cache_ttl > 0:
+                with self._cache_lock:
+                    if generation != self._generation:
+                        return formatted_results  # Indexed meanwhile; don't cache
+                    self._results[key] = (time.monotonic(), [dict(r) for r in formatted_results])
+                    while len(self._results) > self.result_cache_size:
+                        self._results.popitem(last=False)
             return formatted_results
             
         except Exception as e:
             logger.error(f"Search failed: {e}")
             return []
     
+    @staticmethod
+    def _build_where(start_time: Optional[datetime] = None,
+                     end_time: Optional[datetime] = None,
+                     cameras: Optional[List[str]] = None) -> Optional[Dict]:
+        """Chroma where clause for the time range (numeric "ts") and cameras"""
+        conditions = []
+        if cameras:
+            if len(cameras) == 1:
+                conditions.append({"camera": cameras[0]})
+            else:
+                conditions.append({"camera": {"$in": list(cameras)}})
+        if start_time:
+            conditions.append({"ts": {"$gte": start_time.timestamp()}})
+        if end_time:
+            conditions.append({"ts": {"$lte": end_time.timestamp()}})
+        
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+    
+    def migrate_epoch_metadata(self, batch_size: int = 500) -> int:
+        """
+        Backfill numeric "ts" metadata on events indexed before it existed.
+        
+        Returns:
+            Number of events updated
+        """
+        if self.collection is None:
+            return 0
+        
+        updated = 0
+        offset = 0
+        try:
+            while True:
+                page = self.collection.get(limit=batch_size, offset=offset, include=["metadatas"])
+                if not page['ids']:
+                    break
+                ids, metadatas = [], []
+                for event_id, metadata in zip(page['ids'], page['metadatas']):
+                    if metadata and "ts" not in metadata and "timestamp" in metadata:
+                        ts = datetime.fromisoformat(metadata['timestamp']).timestamp()
+                        ids.append(event_id)
+                        metadatas.append({**metadata, "ts": ts})
+                if ids:
+                    self.collection.update(ids=ids, metadatas=metadatas)
+                    self._invalidate_results()
+                    updated += len(ids)
+                offset += len(page['ids'])
+            
+            collection_metadata = dict(self.collection.metadata or {})
+            collection_metadata["schema_version"] = SCHEMA_VERSION
+            self.collection.modify(metadata=collection_metadata)
+            logger.info(f"Backfilled epoch metadata on {updated} events")
+        except Exception as e:
+            logger.error(f"Epoch metadata migration failed: {e}")
+        return updated
+    
     def search_temporal(self, 
                        query: str,
                        time_expression: str,
@@ -385,7 +574,8 @@ class SemanticSearch:
                 "total_events": count,
                 "collection_name": self.collection_name,
                 "embedding_model": self.embedding_model_name,
-                "persist_directory": str(self.persist_directory)
+                "persist_directory": str(self.persist_directory),
+                "cache": self.get_cache_stats()
             }
         except Exception as e:
             logger.error(f"Failed to get stats: {e}")
@@ -407,13 +597,14 @@ class SemanticSearch:
         cutoff = datetime.now() - timedelta(days=days)
         
         try:
-            # Query for old events
+            # Query for old events (numeric comparison; Chroma can't compare strings)
             results = self.collection.get(
-                where={"date": {"$lt": cutoff.strftime("%Y-%m-%d")}}
+                where={"ts": {"$lt": cutoff.timestamp()}}
             )
             
             if results['ids']:
                 self.collection.delete(ids=results['ids'])
+                self._invalidate_results()
                 logger.info(f"Deleted {len(results['ids'])} old events")
                 return len(results['ids'])
             
@@ -449,26 +640,37 @@ class SimpleTextSearch:
                    detections: Optional[List[Dict]] = None,
                    confidence: float = 1.0) -> str:
         """Index event to file"""
-        event_id = hashlib.md5(
-            f"{timestamp.isoformat()}_{camera}".encode()
-        ).hexdigest()[:16]
-        
-        event = SceneEvent(
-            event_id=event_id,
-            timestamp=timestamp,
-            camera=camera,
-            image_path=image_path,
-            description=description,
-            detections=detections or [],
-            confidence=confidence
-        )
-        
-        self.events.append(event)
-        
+        return self.index_events([{
+            "timestamp": timestamp,
+            "camera": camera,
+            "image_path": image_path,
+            "description": description,
+            "detections": detections,
+            "confidence": confidence
+        }])[0]
+    
+    def index_events(self, events: List[Union[Dict, SceneEvent]]) -> List[str]:
+        """Index many events with a single file append"""
+        new_events = []
+        for e in events:
+            fields = e.__dict__ if isinstance(e, SceneEvent) else e
+            new_events.append(SceneEvent(
+                event_id=hashlib.md5(
+                    f"{fields['timestamp'].isoformat()}_{fields['camera']}".encode()
+                ).hexdigest()[:16],
+                timestamp=fields["timestamp"],
+                camera=fields["camera"],
+                image_path=fields["image_path"],
+                description=fields["description"],
+                detections=list(fields.get("detections") or []),
+                confidence=fields.get("confidence", 1.0)
+            ))
+        
+        self.events.extend(new_events)
         with open(self.events_file, 'a') as f:
-            f.write(json.dumps(event.to_dict(), default=str) + '\n')
+            f.writelines(json.dumps(e.to_dict(), default=str) + '\n' for e in new_events)
         
-        return event_id
+        return [e.event_id for e in new_events]
     
     def search(self, query: str, **kwargs) -> List[Dict]:
         """Simple keyword search"""
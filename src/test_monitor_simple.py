@@ -7,12 +7,12 @@ from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from detector import ObjectDetector
+from model_server import create_detector
 from config import DATA_DIR
 
 class SimpleTestMonitor:
     def __init__(self):
-        self.detector = ObjectDetector()
+        self.detector = create_detector()
         self.running = True
         self.last_alert = None
         self.alert_count = 0
@@ -41,8 +41,8 @@ class SimpleTestMonitor:
                     latest = images[0]
                     
                     # Detect
-                    detections = self.detector.detect(latest)
-                    people = [d for d in detections if d['class'] == 'person']
+                    detections = self.detector.detect(latest, classes=["person"])
+                    people = detections.persons()
                     
                     if people:
                         current_time = datetime.now()
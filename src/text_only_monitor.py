@@ -8,7 +8,8 @@ import time
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from detector import ObjectDetector
+from model_server import create_detector
+from motion_gate import MotionGate
 from smart_alerts import SmartAlertManager
 from config import DATA_DIR
 import logging
@@ -20,7 +21,7 @@ class TextOnlyMonitor:
     """Monitor cameras and send text-only alerts"""
     
     def __init__(self):
-        self.detector = ObjectDetector()
+        self.detector = create_detector()
         self.alert_manager = SmartAlertManager(
             config_path=Path(__file__).parent.parent / "config" / "alerts_config.yaml",
             telegram_notifier=None
@@ -28,12 +29,13 @@ class TextOnlyMonitor:
         self.running = True
         
     def __init__(self):
-        self.detector = ObjectDetector()
+        self.detector = create_detector()
         self.alert_manager = SmartAlertManager(
             config_path=Path(__file__).parent.parent / "config" / "alerts_config.yaml",
             telegram_notifier=None
         )
         self.running = True
+        self.motion_gate = MotionGate()  # Skip YOLO on unchanged frames
         self.last_alert_time = {}  # Track last alert per camera
         self.person_present = {}   # Track if person is currently present
         
@@ -51,10 +53,14 @@ class TextOnlyMonitor:
                     
                     if latest != last_processed:
                         last_processed = latest
-                        
+                        changed = self.motion_gate.has_changed(camera_name, latest)
+                    else:
+                        changed = False
+                    
+                    if changed:
                         # Detect
-                        detections = self.detector.detect(latest)
-                        people = [d for d in detections if d['class'] == 'person']
+                        detections = self.detector.detect(latest, classes=["person"])
+                        people = detections.persons()
                         
                         current_time = datetime.now()
                         has_people = len(people) > 0
@@ -129,6 +135,7 @@ class TextOnlyMonitor:
     
     def stop(self):
         self.running = False
+        logger.info(f"Motion gate stats: {self.motion_gate.get_stats()}")
 
 if __name__ == "__main__":
     monitor = TextOnlyMonitor()
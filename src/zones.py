@@ -0,0 +1,106 @@
+"""Zone Geometry Module - Crops, tiles and box merging for region-restricted detection"""
+from typing import Dict, List, Sequence, Tuple
+import cv2
+import numpy as np
+
+Rect = Tuple[int, int, int, int]  # x1, y1, x2, y2 in pixels
+
+
+def polygon_to_pixels(polygon: Sequence[Sequence[float]], width: int, height: int) -> np.ndarray:
+    """Convert a polygon in normalized (0-1) coordinates to int32 pixel points"""
+    points = np.asarray(polygon, dtype=np.float32).reshape(-1, 2)
+    points = points * np.array([width, height], dtype=np.float32)
+    return np.round(points).astype(np.int32)
+
+
+def _overlaps(a: Rect, b: Rect) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def zone_rects(polygons: List[np.ndarray], width: int, height: int,
+               pad: float = 0.05) -> List[Rect]:
+    """
+    Padded bounding rectangles covering the polygons, with overlapping
+    rectangles merged so no area is inferred twice.
+    """
+    pad_x, pad_y = int(width * pad), int(height * pad)
+    rects = []
+    for poly in polygons:
+        x, y, w, h = cv2.boundingRect(poly)
+        rects.append((max(0, x - pad_x), max(0, y - pad_y),
+                      min(width, x + w + pad_x), min(height, y + h + pad_y)))
+
+    merged = True
+    while merged:
+        merged = False
+        out: List[Rect] = []
+        for rect in rects:
+            for i, other in enumerate(out):
+                if _overlaps(rect, other):
+                    out[i] = (min(rect[0], other[0]), min(rect[1], other[1]),
+                              max(rect[2], other[2]), max(rect[3], other[3]))
+                    merged = True
+                    break
+            else:
+                out.append(rect)
+        rects = out
+    return rects
+
+
+def tile_rects(width: int, height: int, tile_size: int, overlap: float = 0.2) -> List[Rect]:
+    """Overlapping square tiles covering the whole frame"""
+    tile_size = min(tile_size, width, height)
+    stride = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length: int) -> List[int]:
+        positions = list(range(0, max(1, length - tile_size + 1), stride))
+        if positions[-1] + tile_size < length:
+            positions.append(length - tile_size)
+        return positions
+
+    return [(x, y, x + tile_size, y + tile_size)
+            for y in starts(height) for x in starts(width)]
+
+
+def points_in_polygons(points: np.ndarray, polygons: List[np.ndarray]) -> np.ndarray:
+    """Boolean mask of which (x, y) points fall inside any polygon"""
+    inside = np.zeros(len(points), dtype=bool)
+    for poly in polygons:
+        contour = poly.reshape(-1, 1, 2).astype(np.float32)
+        for i, (x, y) in enumerate(points):
+            if not inside[i] and cv2.pointPolygonTest(contour, (float(x), float(y)), False) >= 0:
+                inside[i] = True
+    return inside
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, class_ids: np.ndarray,
+        iou_threshold: float = 0.5) -> np.ndarray:
+    """Class-aware non-maximum suppression; returns kept indices (score order)"""
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Offset each class into its own coordinate range so one pass is class-aware
+    offsets = class_ids.astype(np.float32)[:, None] * (boxes.max() + 1)
+    shifted = boxes + offsets
+    x1, y1, x2, y2 = shifted.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-scores)
+
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[iou < iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def active_polygons(camera_config: Dict, width: int, height: int) -> List[np.ndarray]:
+    """Pixel polygons for a camera's active zones (all configured zones by default)"""
+    polygons = camera_config.get("zone_polygons", {})
+    active = camera_config.get("active_zones") or list(polygons)
+    return [polygon_to_pixels(polygons[z], width, height) for z in active if z in polygons]